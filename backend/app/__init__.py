@@ -1,3 +1,5 @@
+import os
+import click
 from flask import Flask
 from .config import Config
 from .extensions import mongo, db, login_manager, csrf
@@ -42,4 +44,63 @@ def create_app():
     csrf.exempt(api_bp)
     app.register_blueprint(api_bp)
 
+    @app.cli.command("ensure-indexes")
+    def ensure_indexes_command():
+        from .services.index_service import ensure_mongo_indexes
+        for collection, names in ensure_mongo_indexes().items():
+            print(f"{collection}: {', '.join(names)}")
+
+    @app.cli.command("check-indexes")
+    def check_indexes_command():
+        from .services.index_service import verify_mongo_indexes
+        report = verify_mongo_indexes()
+        if not report:
+            print("All Mongo indexes present.")
+            return
+        for collection, problems in report.items():
+            print(f"{collection}: missing={problems['missing']} mismatched={problems['mismatched']}")
+        raise SystemExit(1)
+
+    @app.cli.command("warm-translations")
+    @click.option("--lang", "langs", multiple=True, help="Language code to warm; defaults to every supported language.")
+    @click.option("--force", is_flag=True, help="Re-check languages even if the menu text is unchanged.")
+    def warm_translations_command(langs, force):
+        from .services.translate_service import SUPPORTED_LANGS
+        from .services.menu_service import warm_menu_translations
+        report = warm_menu_translations(langs or list(SUPPORTED_LANGS), force=force)
+        for lang, result in report.items():
+            print(f"{lang}: {result['status']} ({result['strings']} strings)")
+
+    @app.cli.command("sweep-translations")
+    @click.option("--days", type=float, default=None, help="Delete entries unused for this many days.")
+    def sweep_translations_command(days):
+        from .services.translate_service import flush_translation_usage, sweep_translation_cache
+        flush_translation_usage(sync=True)
+        days = days if days is not None else float(os.getenv("TRANSLATION_CACHE_UNUSED_DAYS", "90"))
+        print(f"Deleted {sweep_translation_cache(days)} translation cache entries unused for {days:g} days.")
+
+    @app.cli.command("dispatch-outbox")
+    @click.option("--loop", is_flag=True, help="Keep polling instead of draining once.")
+    def dispatch_outbox_command(loop):
+        from .services.outbox_service import dispatch_pending, run_dispatcher
+        if loop:
+            run_dispatcher(app)
+        else:
+            print(dispatch_pending())
+
+    if os.getenv("MONGO_ENSURE_INDEXES") == "1":
+        from .services.index_service import ensure_mongo_indexes
+        try:
+            with app.app_context():
+                ensure_mongo_indexes()
+        except Exception:
+            app.logger.exception("Mongo index bootstrap failed")
+
+    # confirmations are only queued when ORDER_CONFIRMATION_URL is set, so run the in-process
+    # dispatcher by default in that case; OUTBOX_DISPATCHER=off leaves it to `flask dispatch-outbox`
+    default_dispatcher = "thread" if os.getenv("ORDER_CONFIRMATION_URL", "").strip() else "off"
+    if os.getenv("OUTBOX_DISPATCHER", default_dispatcher).strip().lower() == "thread":
+        from .services.outbox_service import start_dispatcher_thread
+        start_dispatcher_thread(app)
+
     return app
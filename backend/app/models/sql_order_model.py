@@ -1,6 +1,8 @@
 from datetime import datetime, timezone
 from app.extensions import db
 
+ORDER_STATUSES = ("created", "paid", "preparing", "ready", "completed", "cancelled")
+
 
 class Order(db.Model):
     __tablename__ = "orders"
@@ -10,7 +12,7 @@ class Order(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     user = db.relationship("User", backref=db.backref("orders", lazy=True))
 
-    status = db.Column(db.String(50), nullable=False, default="created")  # created, paid, preparing, ready, delivered, cancelled
+    status = db.Column(db.String(50), nullable=False, default="created")  # one of ORDER_STATUSES
 
     currency = db.Column(db.String(3), nullable=False, default="GBP")
     total_amount = db.Column(db.Numeric(10, 2), nullable=False, default=0)
@@ -19,6 +21,10 @@ class Order(db.Model):
 
     order_items = db.relationship("OrderItem", back_populates="order", cascade="all, delete-orphan", lazy=True)
 
+    __table_args__ = (
+        db.Index("ix_orders_created_at_id", "created_at", "id"),
+    )
+
     def __repr__(self):
         return f"<Order {self.id} user={self.user_id} status={self.status}>"
 
@@ -5,8 +5,11 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
 
 from app.extensions import mongo
-from app.services.storage_service import upload_menu_image, delete_gcs_object
-from app.services.admin_service import get_recent_orders_for_admin
+from app.models.sql_order_model import ORDER_STATUSES
+from app.services.image_service import create_uploaded_image, delete_uploaded_image_objects
+from app.services.admin_service import list_orders_for_admin
+from app.services.homepage_service import invalidate_homepage_slots
+from app.services.pagination_service import parse_limit, parse_date_filter
 
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
@@ -42,26 +45,16 @@ def upload_menu_image_page():
             return redirect(url_for("admin.upload_menu_image_page"))
 
         try:
-            result = upload_menu_image(f, folder="menu")
-
-            if isinstance(result, str):
-                url = result
-                object_name = None
-            else:
-                url = result.get("url")
-                object_name = result.get("object_name")
+            doc = create_uploaded_image(f, folder="menu")
+            url = doc.get("url")
 
             if not url:
                 raise RuntimeError("Upload succeeded but no URL was returned.")
 
-            mongo.db.uploaded_images.insert_one({
-                "url": url,
-                "object_name": object_name,
-                "uploaded_at": datetime.now(timezone.utc),
-                "active": True,
-            })
-
-            flash("Uploaded successfully and added to image library.", "success")
+            if doc.get("deduplicated"):
+                flash("This image is already in the library; reusing the existing copy.", "info")
+            else:
+                flash("Uploaded successfully and added to image library.", "success")
             return render_template("admin_upload_menu_image.html", uploaded_url=url)
 
         except Exception as e:
@@ -117,6 +110,7 @@ def update_homepage_slots():
         }},
         upsert=True,
     )
+    invalidate_homepage_slots()
 
     flash("Homepage image slots updated.", "success")
     return redirect(url_for("admin.upload_menu_image_page"))
@@ -138,6 +132,7 @@ def hide_uploaded_image():
         {"_id": ObjectId(image_id)},
         {"$set": {"active": False}}
     )
+    invalidate_homepage_slots()
 
     flash("Image hidden from library.", "success")
     return redirect(url_for("admin.upload_menu_image_page"))
@@ -162,8 +157,7 @@ def delete_uploaded_image():
         return redirect(url_for("admin.upload_menu_image_page"))
 
     try:
-        if doc.get("object_name"):
-            delete_gcs_object(doc["object_name"])
+        delete_uploaded_image_objects(doc)
     except Exception as e:
         flash(f"Bucket delete failed: {e}", "danger")
         return redirect(url_for("admin.upload_menu_image_page"))
@@ -180,6 +174,7 @@ def delete_uploaded_image():
     )
 
     mongo.db.uploaded_images.delete_one({"_id": oid})
+    invalidate_homepage_slots()
 
     flash("Image deleted from bucket and library.", "success")
     return redirect(url_for("admin.upload_menu_image_page"))
@@ -192,8 +187,31 @@ def orders_dashboard():
     if guard:
         return guard
 
-    orders = get_recent_orders_for_admin(limit=50)
-    return render_template("admin_orders.html", orders=orders)
+    filters = {
+        "status": (request.args.get("status") or "").strip().lower(),
+        "from": (request.args.get("from") or "").strip(),
+        "to": (request.args.get("to") or "").strip(),
+    }
+
+    try:
+        page = list_orders_for_admin(
+            limit=parse_limit(request.args.get("limit")),
+            cursor=request.args.get("cursor"),
+            status=filters["status"] or None,
+            created_from=parse_date_filter(filters["from"]),
+            created_to=parse_date_filter(filters["to"]),
+        )
+    except ValueError:
+        flash("Invalid order filter or page.", "warning")
+        return redirect(url_for("admin.orders_dashboard"))
+
+    return render_template(
+        "admin_orders.html",
+        orders=page["orders"],
+        next_cursor=page["next_cursor"],
+        filters=filters,
+        statuses=ORDER_STATUSES,
+    )
 
 
 @admin_bp.route("/images", methods=["GET"])
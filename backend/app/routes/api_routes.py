@@ -1,14 +1,24 @@
+import os
+import threading
 from datetime import datetime, timezone
 from bson import ObjectId
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, abort, current_app, jsonify, request, send_file
 from flask_login import current_user, login_required
 
 from app.extensions import mongo, db
-from app.models.sql_order_model import Order
-from app.services.menu_service import get_menu_boxes
-from app.services.translate_service import translate_text
-from app.services.storage_service import upload_menu_image, delete_gcs_object
+from app.models.sql_order_model import ORDER_STATUSES, Order
+from app.services.menu_service import get_menu_boxes_with_status, bump_menu_version, warm_menu_translations
+from app.services.translate_service import SUPPORTED_LANGS, translate_text, translate_texts, translation_cache_stats
+from app.services.image_service import (
+    create_uploaded_image,
+    delete_uploaded_image_objects,
+    srcset_variants,
+    issue_direct_upload,
+    confirm_direct_upload,
+)
+from app.services.storage_backends import LocalStorageBackend, StorageBackendError, get_storage_backend
+from app.services.gcp_clients import client_stats
 from app.services.order_service import (
     get_cart,
     add_to_cart,
@@ -17,10 +27,13 @@ from app.services.order_service import (
     clear_cart,
     cart_totals,
     checkout_to_sql_order,
+    list_order_history,
     notify_order_confirmation_by_order_id
 )
 
-from app.services.admin_service import get_recent_orders_for_admin, get_order_for_admin
+from app.services.admin_service import list_orders_for_admin, get_order_for_admin
+from app.services.homepage_service import get_homepage_slots, invalidate_homepage_slots
+from app.services.pagination_service import parse_limit, parse_date_filter
 from app.services.datastore_service import (
     list_order_confirmations,
     get_order_confirmation,
@@ -57,16 +70,105 @@ def status():
 @api_bp.route("/menu", methods=["GET"])
 def api_menu():
     lang = (request.args.get("lang") or "en").strip().lower()
-    items = get_menu_boxes(group_by_category=True, target_language=lang)
-    return jsonify(items)
+    items, partial = get_menu_boxes_with_status(group_by_category=True, target_language=lang)
+    resp = jsonify(items)
+    if partial:
+        resp.headers["X-Translation-Partial"] = "1"
+    return resp
+
+
+@api_bp.route("/admin/menu/refresh", methods=["POST"])
+@login_required
+def api_admin_menu_refresh():
+    guard = _admin_only()
+    if guard:
+        return guard
+
+    version = bump_menu_version()
+    return jsonify({"ok": True, "menu_version": version})
+
+
+@api_bp.route("/admin/menu/warm-translations", methods=["POST"])
+@login_required
+def api_admin_menu_warm_translations():
+    guard = _admin_only()
+    if guard:
+        return guard
+
+    data = request.get_json(silent=True) or {}
+    langs = [l for l in (data.get("languages") or list(SUPPORTED_LANGS)) if l in SUPPORTED_LANGS]
+    force = bool(data.get("force"))
+    app = current_app._get_current_object()
+
+    def run():
+        with app.app_context():
+            try:
+                report = warm_menu_translations(langs, force=force)
+                app.logger.info("Menu translation warmup finished: %s", report)
+            except Exception:
+                app.logger.exception("Menu translation warmup failed")
+
+    threading.Thread(target=run, name="menu-translation-warmup", daemon=True).start()
+    return jsonify({"ok": True, "started": True, "languages": langs}), 202
+
+
+@api_bp.route("/admin/translations/stats", methods=["GET"])
+@login_required
+def api_admin_translation_stats():
+    guard = _admin_only()
+    if guard:
+        return guard
+
+    try:
+        stats = translation_cache_stats()
+    except Exception as e:
+        return jsonify({"error": "stats_read_failed", "details": repr(e)}), 500
+
+    return jsonify(stats), 200
+
+
+@api_bp.route("/admin/clients/stats", methods=["GET"])
+@login_required
+def api_admin_client_stats():
+    guard = _admin_only()
+    if guard:
+        return guard
+
+    return jsonify(client_stats()), 200
+
+
+def _translate_batch(payload: dict, target: str):
+    texts = payload.get("texts")
+    source = (payload.get("source_language") or "").strip() or None
+
+    if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+        return jsonify({"error": "'texts' must be a list of strings"}), 400
+
+    max_items = int(os.getenv("TRANSLATE_BATCH_MAX_ITEMS", "100"))
+    max_chars = int(os.getenv("TRANSLATE_BATCH_MAX_CHARS", "20000"))
+    if len(texts) > max_items:
+        return jsonify({"error": "too_many_texts", "max_items": max_items}), 413
+    if sum(len(t) for t in texts) > max_chars:
+        return jsonify({"error": "too_many_characters", "max_chars": max_chars}), 413
+
+    translated = translate_texts(texts, target_language=target, source_language=source)
+    return jsonify({
+        "inputs": texts,
+        "target_language": target,
+        "source_language": source,
+        "translated": translated,
+    })
 
 
 @api_bp.route("/translate", methods=["POST"])
 def api_translate():
     payload = request.get_json(silent=True) or {}
-    text = (payload.get("text") or "").strip()
     target = (payload.get("target_language") or "it").strip()
 
+    if "texts" in payload:
+        return _translate_batch(payload, target)
+
+    text = (payload.get("text") or "").strip()
     if not text:
         return jsonify({"error": "Missing 'text'"}), 400
 
@@ -92,26 +194,106 @@ def api_admin_upload_menu_image():
     if not f or not f.filename:
         return jsonify({"error": "No file selected"}), 400
 
-    result = upload_menu_image(f, folder="menu")
+    doc = create_uploaded_image(f, folder="menu")
+    if not doc.get("url"):
+        return jsonify({"error": "Upload succeeded but URL missing"}), 500
 
-    if isinstance(result, str):
-        url = result
-        object_name = None
-    else:
-        url = result.get("url")
-        object_name = result.get("object_name")
+    return jsonify(_uploaded_image_json(doc))
 
-    if not url:
-        return jsonify({"error": "Upload succeeded but URL missing"}), 500
 
-    mongo.db.uploaded_images.insert_one({
-        "url": url,
-        "object_name": object_name,
-        "uploaded_at": datetime.now(timezone.utc),
-        "active": True,
-    })
+def _uploaded_image_json(doc: dict) -> dict:
+    return {
+        "id": str(doc["_id"]),
+        "url": doc.get("url"),
+        "object_name": doc.get("object_name"),
+        "variants_status": doc.get("variants_status"),
+        "deduplicated": bool(doc.get("deduplicated")),
+    }
+
+
+@api_bp.route("/admin/uploads/sign", methods=["POST"])
+@login_required
+def api_admin_sign_upload():
+    guard = _admin_only()
+    if guard:
+        return guard
+
+    data = request.get_json(silent=True) or {}
+    try:
+        size = int(data["size"]) if data.get("size") is not None else None
+    except (TypeError, ValueError):
+        return jsonify({"ok": False, "error": "invalid_size"}), 400
+
+    result = issue_direct_upload(
+        data.get("filename"),
+        data.get("content_type"),
+        size=size,
+        sha256=data.get("sha256"),
+        resumable=bool(data.get("resumable")),
+        origin=request.headers.get("Origin"),
+    )
+    if not result.get("ok"):
+        return jsonify(result), 400
+
+    if result.get("deduplicated"):
+        return jsonify({"ok": True, "deduplicated": True, "image": _uploaded_image_json(result["image"])})
 
-    return jsonify({"url": url, "object_name": object_name})
+    return jsonify(result)
+
+
+@api_bp.route("/admin/uploads/confirm", methods=["POST"])
+@login_required
+def api_admin_confirm_upload():
+    guard = _admin_only()
+    if guard:
+        return guard
+
+    data = request.get_json(silent=True) or {}
+    result = confirm_direct_upload(data.get("upload_token"))
+    if not result.get("ok"):
+        code = 409 if result.get("error") == "object_not_found" else 400
+        return jsonify(result), code
+
+    return jsonify({"ok": True, "image": _uploaded_image_json(result["image"])}), 201
+
+
+def _local_storage_backend() -> LocalStorageBackend:
+    backend = get_storage_backend()
+    if not isinstance(backend, LocalStorageBackend):
+        abort(404)
+    return backend
+
+
+@api_bp.route("/storage/local/upload/<token>", methods=["PUT"])
+def api_local_storage_upload(token):
+    backend = _local_storage_backend()
+    claims = backend.verify_upload_token(token, max_age=int(os.getenv("IMAGE_UPLOAD_URL_TTL_SECONDS", "900")))
+    if not claims:
+        return jsonify({"error": "invalid_upload_token"}), 403
+
+    backend.upload_bytes(claims["object_name"], request.get_data(), claims["content_type"])
+    return "", 200
+
+
+@api_bp.route("/storage/local/<path:object_name>", methods=["GET"])
+def api_local_storage_object(object_name):
+    backend = _local_storage_backend()
+    try:
+        info = backend.stat(object_name)
+    except StorageBackendError:
+        abort(404)
+    if info is None:
+        abort(404)
+    return send_file(backend.path_for(object_name), mimetype=info.get("content_type") or "application/octet-stream")
+
+
+def _cart_response(cart: dict):
+    items, total = cart_totals(cart)
+    return jsonify({
+        "ok": True,
+        "items": items,
+        "total": round(float(total), 2)
+    })
 
 
 @api_bp.route("/cart", methods=["GET"])
@@ -136,23 +318,12 @@ def api_add_cart_item():
     if not menu_item_id or not variant_id:
         return jsonify({"error": "menu_item_id and variant_id required"}), 400
 
-    before = get_cart()
-    before_items = len(before.get("items", []) or [])
+    result = add_to_cart(menu_item_id, variant_id, qty)
+    if not result.get("ok"):
+        code = 404 if result.get("error") == "item_not_found" else 409
+        return jsonify({"error": result.get("error")}), code
 
-    add_to_cart(menu_item_id, variant_id, qty)
-
-    after = get_cart()
-    after_items = len(after.get("items", []) or [])
-
-    if after_items == before_items and before_items == 0:
-        return jsonify({"error": "item_not_found"}), 404
-
-    items, total = cart_totals(after)
-    return jsonify({
-        "ok": True,
-        "items": items,
-        "total": round(float(total), 2)
-    })
+    return _cart_response(result["cart"])
 
 
 @api_bp.route("/cart/items/<line_id>", methods=["PATCH"])
@@ -164,27 +335,21 @@ def api_update_cart_item(line_id: str):
     if qty is None:
         return jsonify({"error": "qty required"}), 400
 
-    update_cart_line(line_id, qty)
-    cart = get_cart()
-    items, total = cart_totals(cart)
-    return jsonify({
-        "ok": True,
-        "items": items,
-        "total": round(float(total), 2)
-    })
+    result = update_cart_line(line_id, qty)
+    if not result.get("ok"):
+        return jsonify({"error": result.get("error")}), 404
+
+    return _cart_response(result["cart"])
 
 
 @api_bp.route("/cart/items/<line_id>", methods=["DELETE"])
 @login_required
 def api_delete_cart_item(line_id: str):
-    remove_cart_line(line_id)
-    cart = get_cart()
-    items, total = cart_totals(cart)
-    return jsonify({
-        "ok": True,
-        "items": items,
-        "total": round(float(total), 2)
-    })
+    result = remove_cart_line(line_id)
+    if not result.get("ok"):
+        return jsonify({"error": result.get("error")}), 404
+
+    return _cart_response(result["cart"])
 
 
 @api_bp.route("/cart/clear", methods=["POST"])
@@ -207,25 +372,28 @@ def api_checkout():
 @api_bp.route("/orders", methods=["GET"])
 @login_required
 def api_list_orders():
-    orders = (
-        Order.query
-        .filter_by(user_id=int(current_user.get_id()))
-        .order_by(Order.created_at.desc())
-        .all()
-    )
+    try:
+        page = list_order_history(
+            int(current_user.get_id()),
+            limit=parse_limit(request.args.get("limit"), default=20, maximum=100),
+            cursor=request.args.get("cursor"),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     results = []
-    for o in orders:
+    for o in page["orders"]:
         results.append({
             "order_id": o.id,
             "status": o.status,
             "currency": o.currency,
             "total_amount": float(o.total_amount or 0),
             "created_at": _iso(o.created_at),
-            "items_count": len(o.order_items or []),
+            "items_count": int(o.items_count or 0),
+            "items_qty": int(o.items_qty or 0),
         })
 
-    return jsonify({"orders": results})
+    return jsonify({"orders": results, "next_cursor": page["next_cursor"]})
 
 
 @api_bp.route("/orders/<int:order_id>", methods=["GET"])
@@ -264,42 +432,42 @@ def api_admin_orders():
     if guard:
         return guard
 
-    results = get_recent_orders_for_admin(limit=50)
+    try:
+        page = list_orders_for_admin(
+            limit=parse_limit(request.args.get("limit")),
+            cursor=request.args.get("cursor"),
+            status=(request.args.get("status") or "").strip().lower() or None,
+            created_from=parse_date_filter(request.args.get("from")),
+            created_to=parse_date_filter(request.args.get("to")),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     safe = []
-    for r in results:
+    for r in page["orders"]:
         safe.append({
             "order_id": r.get("order_id"),
             "created_at": _iso(r.get("created_at")),
+            "status": r.get("status"),
             "total": float(r.get("total") or 0),
             "user_first_name": r.get("user_first_name", ""),
             "user_last_name": r.get("user_last_name", ""),
             "order_items": r.get("order_items", []),
         })
 
-    return jsonify({"orders": safe})
+    return jsonify({"orders": safe, "next_cursor": page["next_cursor"]})
 
 
 @api_bp.route("/images/homepage", methods=["GET"])
 def api_get_homepage_images():
-    slots = mongo.db.homepage_slots.find_one({"_id": "homepage"}) or {}
-    ids = [slots.get("slot1"), slots.get("slot2"), slots.get("slot3"), slots.get("slot4")]
-
-    valid_ids = [i for i in ids if i]
-    selected = {}
-
-    if valid_ids:
-        for doc in mongo.db.uploaded_images.find({"_id": {"$in": valid_ids}, "active": True}):
-            selected[str(doc["_id"])] = doc
-
     out = []
-    for i in ids:
-        if i and str(i) in selected:
-            doc = selected[str(i)]
+    for doc in get_homepage_slots():
+        if doc:
             out.append({
                 "id": str(doc["_id"]),
                 "url": doc.get("url"),
                 "object_name": doc.get("object_name"),
+                **srcset_variants(doc),
             })
         else:
             out.append(None)
@@ -343,6 +511,7 @@ def api_set_homepage_images():
         }},
         upsert=True,
     )
+    invalidate_homepage_slots()
 
     return jsonify({"ok": True})
 
@@ -389,6 +558,7 @@ def api_admin_hide_image(image_id: str):
         {"_id": oid},
         {"$set": {"active": False}}
     )
+    invalidate_homepage_slots()
 
     return jsonify({"ok": True})
 
@@ -410,8 +580,7 @@ def api_admin_delete_image(image_id: str):
         return jsonify({"error": "not_found"}), 404
 
     try:
-        if doc.get("object_name"):
-            delete_gcs_object(doc["object_name"])
+        delete_uploaded_image_objects(doc)
     except Exception as e:
         return jsonify({"error": f"bucket_delete_failed: {e}"}), 500
 
@@ -427,6 +596,7 @@ def api_admin_delete_image(image_id: str):
     )
 
     mongo.db.uploaded_images.delete_one({"_id": oid})
+    invalidate_homepage_slots()
     return jsonify({"ok": True})
 
 
@@ -454,9 +624,8 @@ def api_admin_order_update_status(order_id: int):
     data = request.get_json(silent=True) or {}
     status = (data.get("status") or "").strip().lower()
 
-    allowed = {"created", "paid", "preparing", "ready", "completed", "cancelled"}
-    if status not in allowed:
-        return jsonify({"error": "invalid_status", "allowed": sorted(allowed)}), 400
+    if status not in ORDER_STATUSES:
+        return jsonify({"error": "invalid_status", "allowed": sorted(ORDER_STATUSES)}), 400
 
     order = Order.query.filter_by(id=int(order_id)).first()
     if not order:
@@ -1,5 +1,6 @@
-from flask import Blueprint, render_template, session, request
-from ..services.menu_service import get_menu_boxes
+from flask import Blueprint, make_response, render_template, session, request
+from ..services.menu_service import get_menu_boxes_with_status
+from ..services.translate_service import SUPPORTED_LANGS
 
 
 menu_bp = Blueprint("menu", __name__)
@@ -8,7 +9,16 @@ menu_bp = Blueprint("menu", __name__)
 @menu_bp.route("/menu", methods=["GET", "POST"])
 def menu():
     lang = (request.args.get("lang") or session.get("lang") or "en").strip().lower()
+    if lang not in SUPPORTED_LANGS:
+        lang = "en"
     session["lang"] = lang
 
-    menu_by_category = get_menu_boxes(group_by_category=True, target_language=lang)
-    return render_template("menu.html", menu_by_category=menu_by_category)
+    menu_by_category, partial = get_menu_boxes_with_status(group_by_category=True, target_language=lang)
+    resp = make_response(render_template(
+        "menu.html",
+        menu_by_category=menu_by_category,
+        translation_partial=partial,
+    ))
+    if partial:
+        resp.headers["X-Translation-Partial"] = "1"
+    return resp
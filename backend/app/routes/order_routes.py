@@ -1,8 +1,10 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
 from app.services.order_service import (
-    get_cart, add_to_cart, update_cart_line, remove_cart_line, clear_cart, cart_totals, checkout_to_sql_order
+    get_cart, add_to_cart, update_cart_line, remove_cart_line, clear_cart, cart_totals, checkout_to_sql_order,
+    list_order_history
 )
+from app.services.pagination_service import parse_limit
 from app.models.sql_order_model import Order
 
 order_bp = Blueprint("orders", __name__)
@@ -27,7 +29,11 @@ def orders_add():
         flash("Could not add item to cart (missing item/variant).", "danger")
         return redirect(url_for("menu.menu"))
 
-    add_to_cart(menu_item_id, variant_id, qty)
+    result = add_to_cart(menu_item_id, variant_id, qty)
+    if not result.get("ok"):
+        flash("Could not add item to cart (item no longer available).", "danger")
+        return redirect(url_for("menu.menu"))
+
     flash("Added to cart.", "success")
     return redirect(url_for("menu.menu"))
 
@@ -42,7 +48,11 @@ def orders_update():
         flash("Could not update cart item.", "danger")
         return redirect(url_for("orders.orders"))
 
-    update_cart_line(line_id, qty)
+    result = update_cart_line(line_id, qty)
+    if not result.get("ok"):
+        flash("Could not update cart item.", "danger")
+        return redirect(url_for("orders.orders"))
+
     flash("Cart updated.", "success")
     return redirect(url_for("orders.orders"))
 
@@ -55,7 +65,11 @@ def orders_remove():
         flash("Could not remove cart item.", "danger")
         return redirect(url_for("orders.orders"))
 
-    remove_cart_line(line_id)
+    result = remove_cart_line(line_id)
+    if not result.get("ok"):
+        flash("Could not remove cart item.", "danger")
+        return redirect(url_for("orders.orders"))
+
     flash("Item removed.", "success")
     return redirect(url_for("orders.orders"))
 
@@ -90,10 +104,13 @@ def confirmation(order_id: int):
 @order_bp.route("/orders/history", methods=["GET"])
 @login_required
 def history():
-    orders = (
-        Order.query
-        .filter_by(user_id=int(current_user.get_id()))
-        .order_by(Order.created_at.desc())
-        .all()
-    )
-    return render_template("order_history.html", orders=orders)
+    try:
+        page = list_order_history(
+            int(current_user.get_id()),
+            limit=parse_limit(request.args.get("limit"), default=20, maximum=100),
+            cursor=request.args.get("cursor"),
+        )
+    except ValueError:
+        return redirect(url_for("orders.history"))
+
+    return render_template("order_history.html", orders=page["orders"], next_cursor=page["next_cursor"])
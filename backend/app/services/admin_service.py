@@ -1,6 +1,7 @@
 from app.models.user_model import User
-from app.models.sql_order_model import Order
-from sqlalchemy.orm import joinedload
+from app.models.sql_order_model import ORDER_STATUSES, Order
+from sqlalchemy.orm import joinedload, selectinload
+from app.services.pagination_service import keyset_page
 
 
 def _order_to_dict(o: Order) -> dict:
@@ -37,14 +38,30 @@ def _order_to_dict(o: Order) -> dict:
     return payload
 
 
+def list_orders_for_admin(
+    limit: int = 50,
+    cursor: str | None = None,
+    status: str | None = None,
+    created_from=None,
+    created_to=None,
+) -> dict:
+    query = Order.query.options(selectinload(Order.order_items), joinedload(Order.user))
+
+    if status:
+        if status not in ORDER_STATUSES:
+            raise ValueError("invalid_status")
+        query = query.filter(Order.status == status)
+    if created_from:
+        query = query.filter(Order.created_at >= created_from)
+    if created_to:
+        query = query.filter(Order.created_at < created_to)
+
+    orders, next_cursor = keyset_page(query, Order.created_at, Order.id, cursor, int(limit))
+    return {"orders": [_order_to_dict(o) for o in orders], "next_cursor": next_cursor}
+
+
 def get_recent_orders_for_admin(limit: int = 50):
-    orders = (
-        Order.query.options(joinedload(Order.order_items), joinedload(Order.user))
-        .order_by(Order.created_at.desc())
-        .limit(int(limit))
-        .all()
-    )
-    return [_order_to_dict(o) for o in orders]
+    return list_orders_for_admin(limit=limit)["orders"]
 
 
 def get_order_for_admin(order_id: int) -> dict | None:
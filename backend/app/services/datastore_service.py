@@ -1,10 +1,11 @@
 from __future__ import annotations
 from typing import Any
 from google.cloud import datastore
+from app.services.gcp_clients import get_client
 
 
 def _client() -> datastore.Client:
-    return datastore.Client()
+    return get_client("datastore")
 
 
 def _entity_to_dict(e: datastore.Entity) -> dict[str, Any]:
@@ -0,0 +1,105 @@
+import os
+import threading
+import time
+from typing import Any, Callable
+
+
+def _storage_client():
+    from google.cloud import storage
+    return storage.Client()
+
+
+def _datastore_client():
+    from google.cloud import datastore
+    return datastore.Client()
+
+
+def _translate_client():
+    from google.cloud import translate_v3 as translate
+    return translate.TranslationServiceClient()
+
+
+def _secretmanager_client():
+    from google.cloud import secretmanager
+    return secretmanager.SecretManagerServiceClient()
+
+
+_factories: dict[str, Callable[[], Any]] = {
+    "storage": _storage_client,
+    "datastore": _datastore_client,
+    "translate": _translate_client,
+    "secretmanager": _secretmanager_client,
+}
+
+_lock = threading.Lock()
+_pid = os.getpid()
+_clients: dict[str, Any] = {}
+_stats: dict[str, dict] = {}
+
+
+def _reset_for_current_process() -> None:
+    # gRPC channels and auth sessions inherited across fork are not safe to use,
+    # so a child (e.g. a gunicorn worker after --preload) starts with an empty registry
+    global _lock, _pid
+    _lock = threading.Lock()
+    _pid = os.getpid()
+    _clients.clear()
+    _stats.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_for_current_process)
+
+
+def get_client(name: str):
+    if os.getpid() != _pid:
+        _reset_for_current_process()
+
+    client = _clients.get(name)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(name)
+        if client is not None:
+            return client
+
+        factory = _factories.get(name)
+        if factory is None:
+            raise KeyError(f"Unknown client {name!r}")
+
+        started = time.perf_counter()
+        client = factory()
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+
+        stat = _stats.setdefault(name, {"created": 0, "total_init_ms": 0.0})
+        stat["created"] += 1
+        stat["total_init_ms"] = round(stat["total_init_ms"] + elapsed_ms, 3)
+        stat["last_init_ms"] = round(elapsed_ms, 3)
+        stat["last_created_at"] = time.time()
+
+        _clients[name] = client
+        return client
+
+
+def register_client_factory(name: str, factory: Callable[[], Any]) -> None:
+    with _lock:
+        _factories[name] = factory
+        _clients.pop(name, None)
+
+
+def reset_clients() -> None:
+    with _lock:
+        _clients.clear()
+        _stats.clear()
+
+
+def client_stats() -> dict:
+    with _lock:
+        return {
+            "pid": _pid,
+            "clients": {
+                name: {**stat, "active": name in _clients}
+                for name, stat in _stats.items()
+            },
+        }
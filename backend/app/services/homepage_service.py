@@ -0,0 +1,50 @@
+import os
+import threading
+import time
+from app.extensions import mongo
+
+_slots_lock = threading.Lock()
+_slots_cache = {"slots": None, "loaded_at": 0.0, "generation": 0}
+
+
+def _slots_cache_seconds() -> float:
+    return float(os.getenv("HOMEPAGE_SLOTS_CACHE_SECONDS", "60"))
+
+
+def _load_homepage_slots() -> list[dict | None]:
+    slots = mongo.db.homepage_slots.find_one({"_id": "homepage"}) or {}
+    ids = [slots.get("slot1"), slots.get("slot2"), slots.get("slot3"), slots.get("slot4")]
+
+    selected = {}
+    valid_ids = [i for i in ids if i]
+
+    if valid_ids:
+        for doc in mongo.db.uploaded_images.find({"_id": {"$in": valid_ids}, "active": True}):
+            selected[str(doc["_id"])] = doc
+
+    return [selected.get(str(i)) if i else None for i in ids]
+
+
+def get_homepage_slots() -> list[dict | None]:
+    now = time.monotonic()
+    with _slots_lock:
+        if _slots_cache["slots"] is not None and now - _slots_cache["loaded_at"] < _slots_cache_seconds():
+            return _slots_cache["slots"]
+        generation = _slots_cache["generation"]
+
+    slots = _load_homepage_slots()
+
+    with _slots_lock:
+        # skip the store if an admin change invalidated the cache mid-load
+        if _slots_cache["generation"] == generation:
+            _slots_cache["slots"] = slots
+            _slots_cache["loaded_at"] = now
+
+    return slots
+
+
+def invalidate_homepage_slots() -> None:
+    with _slots_lock:
+        _slots_cache["slots"] = None
+        _slots_cache["loaded_at"] = 0.0
+        _slots_cache["generation"] += 1
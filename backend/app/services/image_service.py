@@ -0,0 +1,378 @@
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.extensions import mongo
+from app.services.homepage_service import invalidate_homepage_slots
+from app.services.storage_backends import get_storage_backend
+from app.services.storage_service import delete_gcs_object, new_object_name, upload_bytes, upload_menu_image_bytes
+
+logger = logging.getLogger(__name__)
+
+# name -> max width in pixels
+DERIVATIVE_SIZES = {
+    "thumb": 320,
+    "card": 800,
+    "hero": 1600,
+}
+
+DERIVATIVE_FORMATS = {
+    "webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+    "jpg": ("JPEG", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+UPLOAD_CONTENT_TYPES = {"image/jpeg", "image/png", "image/webp"}
+
+_pools_lock = threading.Lock()
+_render_pool: ProcessPoolExecutor | None = None
+_upload_pool: ThreadPoolExecutor | None = None
+
+
+def _derivatives_mode() -> str:
+    return os.getenv("IMAGE_DERIVATIVES_MODE", "async").strip().lower()
+
+
+def _get_render_pool() -> ProcessPoolExecutor:
+    global _render_pool
+    with _pools_lock:
+        if _render_pool is None:
+            # forking a threaded gunicorn worker that holds gRPC/GCS clients can deadlock the child,
+            # so render processes start from a clean interpreter instead
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _render_pool = ProcessPoolExecutor(
+                max_workers=int(os.getenv("IMAGE_DERIVATIVE_WORKERS", "2")),
+                mp_context=multiprocessing.get_context(method),
+            )
+        return _render_pool
+
+
+def _get_upload_pool() -> ThreadPoolExecutor:
+    global _upload_pool
+    with _pools_lock:
+        if _upload_pool is None:
+            _upload_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="image-derivatives")
+        return _upload_pool
+
+
+def render_derivatives(data: bytes) -> list[dict]:
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as src:
+        img = ImageOps.exif_transpose(src)
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+
+        out = []
+        rendered_widths = set()
+        for name, max_width in DERIVATIVE_SIZES.items():
+            width = min(max_width, img.width)
+            if width in rendered_widths:
+                continue
+            rendered_widths.add(width)
+
+            height = max(1, round(img.height * width / img.width))
+            resized = img.resize((width, height), Image.LANCZOS) if width != img.width else img
+
+            for ext, (fmt, content_type, options) in DERIVATIVE_FORMATS.items():
+                buf = io.BytesIO()
+                resized.save(buf, fmt, **options)
+                out.append({
+                    "name": name,
+                    "format": ext,
+                    "content_type": content_type,
+                    "width": width,
+                    "height": height,
+                    "data": buf.getvalue(),
+                })
+        return out
+
+
+def _derivative_object_name(object_name: str, name: str, ext: str) -> str:
+    base = object_name.rsplit(".", 1)[0]
+    return f"{base}/{name}.{ext}"
+
+
+def _store_derivatives(image_id, object_name: str, data: bytes) -> list[dict]:
+    rendered = _get_render_pool().submit(render_derivatives, data).result()
+
+    variants = []
+    for r in rendered:
+        variant_object = _derivative_object_name(object_name, r["name"], r["format"])
+        url = upload_bytes(variant_object, r["data"], r["content_type"])
+        variants.append({
+            "name": r["name"],
+            "format": r["format"],
+            "width": r["width"],
+            "height": r["height"],
+            "url": url,
+            "object_name": variant_object,
+        })
+
+    mongo.db.uploaded_images.update_one(
+        {"_id": image_id},
+        {"$set": {"variants": variants, "variants_status": "ready"}},
+    )
+    # homepage slots embed the image's srcset
+    invalidate_homepage_slots()
+    return variants
+
+
+def _store_derivatives_in_background(app, image_id, object_name: str, data: bytes) -> None:
+    with app.app_context():
+        try:
+            _store_derivatives(image_id, object_name, data)
+        except Exception:
+            logger.exception("Image derivative generation failed for %s", object_name)
+            mongo.db.uploaded_images.update_one({"_id": image_id}, {"$set": {"variants_status": "failed"}})
+
+
+def schedule_derivatives(image_id, object_name: str, data: bytes) -> None:
+    mode = _derivatives_mode()
+    if mode == "off" or not object_name:
+        return
+    if mode == "sync":
+        _store_derivatives(image_id, object_name, data)
+        return
+
+    app = current_app._get_current_object()
+    _get_upload_pool().submit(_store_derivatives_in_background, app, image_id, object_name, data)
+
+
+def _read_and_hash(stream, chunk_size: int = 1024 * 1024) -> tuple[bytes, str, str]:
+    sha256 = hashlib.sha256()
+    md5 = hashlib.md5()
+    buf = io.BytesIO()
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        sha256.update(chunk)
+        md5.update(chunk)
+        buf.write(chunk)
+    return buf.getvalue(), sha256.hexdigest(), md5.hexdigest()
+
+
+def _reuse_existing_image(match: dict) -> dict | None:
+    doc = mongo.db.uploaded_images.find_one_and_update(
+        match,
+        {"$set": {"active": True}},
+        return_document=ReturnDocument.BEFORE,
+    )
+    if not doc:
+        return None
+
+    if not doc.get("active"):
+        invalidate_homepage_slots()
+    doc["active"] = True
+    doc["deduplicated"] = True
+    return doc
+
+
+def _insert_uploaded_image(url: str, object_name: str, data: bytes, sha256: str, md5: str) -> dict:
+    doc = {
+        "url": url,
+        "object_name": object_name,
+        "uploaded_at": datetime.now(timezone.utc),
+        "active": True,
+        "sha256": sha256,
+        "md5": md5,
+        "size_bytes": len(data),
+        "variants": [],
+        "variants_status": "pending" if _derivatives_mode() != "off" else "off",
+    }
+    try:
+        doc["_id"] = mongo.db.uploaded_images.insert_one(doc).inserted_id
+    except DuplicateKeyError:
+        # a concurrent upload of the same file won the insert; drop our copy
+        try:
+            delete_gcs_object(doc["object_name"])
+        except Exception:
+            logger.exception("Could not delete duplicate upload %s", doc["object_name"])
+        existing = _reuse_existing_image({"sha256": sha256})
+        if existing:
+            return existing
+        raise
+
+    schedule_derivatives(doc["_id"], doc["object_name"], data)
+    return doc
+
+
+def create_uploaded_image(file_storage, folder: str = "menu") -> dict:
+    data, sha256, md5 = _read_and_hash(file_storage.stream)
+
+    existing = _reuse_existing_image({"sha256": sha256})
+    if existing:
+        return existing
+
+    result = upload_menu_image_bytes(
+        data,
+        getattr(file_storage, "filename", None),
+        getattr(file_storage, "mimetype", None),
+        folder=folder,
+    )
+    return _insert_uploaded_image(result["url"], result["object_name"], data, sha256, md5)
+
+
+def _upload_max_bytes() -> int:
+    return int(os.getenv("IMAGE_UPLOAD_MAX_BYTES", str(15 * 1024 * 1024)))
+
+
+def _upload_url_ttl_seconds() -> int:
+    return int(os.getenv("IMAGE_UPLOAD_URL_TTL_SECONDS", "900"))
+
+
+def _upload_token_serializer() -> URLSafeTimedSerializer:
+    return URLSafeTimedSerializer(current_app.config["SECRET_KEY"], salt="direct-image-upload")
+
+
+def issue_direct_upload(filename: str | None, content_type: str | None, size: int | None = None,
+                        sha256: str | None = None, resumable: bool = False, origin: str | None = None,
+                        folder: str = "menu") -> dict:
+    content_type = (content_type or "").strip().lower()
+    if content_type not in UPLOAD_CONTENT_TYPES:
+        return {"ok": False, "error": "unsupported_content_type"}
+    if size is not None and (size <= 0 or size > _upload_max_bytes()):
+        return {"ok": False, "error": "file_too_large", "max_bytes": _upload_max_bytes()}
+
+    if sha256:
+        existing = _reuse_existing_image({"sha256": sha256.strip().lower()})
+        if existing:
+            return {"ok": True, "deduplicated": True, "image": existing}
+
+    object_name = new_object_name(filename, folder)
+    ttl = _upload_url_ttl_seconds()
+    upload = get_storage_backend().signed_upload(
+        object_name, content_type, ttl, resumable=resumable, size=size, origin=origin,
+    )
+    token = _upload_token_serializer().dumps({"object_name": object_name, "content_type": content_type})
+
+    return {
+        "ok": True,
+        "deduplicated": False,
+        "object_name": object_name,
+        "upload": upload,
+        "upload_token": token,
+        "expires_in": ttl,
+    }
+
+
+def confirm_direct_upload(upload_token: str) -> dict:
+    try:
+        # allow the client the full URL lifetime plus time to finish a slow upload
+        claims = _upload_token_serializer().loads(upload_token or "", max_age=_upload_url_ttl_seconds() * 2)
+    except BadSignature:
+        return {"ok": False, "error": "invalid_upload_token"}
+
+    object_name = claims["object_name"]
+    backend = get_storage_backend()
+
+    existing = mongo.db.uploaded_images.find_one({"object_name": object_name})
+    if existing:
+        return {"ok": True, "image": existing}
+
+    info = backend.stat(object_name)
+    if info is None:
+        return {"ok": False, "error": "object_not_found"}
+
+    if info.get("size") and info["size"] > _upload_max_bytes():
+        backend.delete(object_name)
+        return {"ok": False, "error": "file_too_large", "max_bytes": _upload_max_bytes()}
+
+    # dedup on the checksum the bucket already stores, so the worker never downloads the upload here;
+    # the sha256 and derivatives are filled in by _finish_direct_upload
+    md5 = info.get("md5")
+    if md5:
+        existing = _reuse_existing_image({"md5": md5})
+        if existing:
+            backend.delete(object_name)
+            return {"ok": True, "image": existing}
+
+    doc = {
+        "url": backend.public_url(object_name),
+        "object_name": object_name,
+        "uploaded_at": datetime.now(timezone.utc),
+        "active": True,
+        "md5": md5,
+        "size_bytes": info.get("size"),
+        "variants": [],
+        "variants_status": "pending" if _derivatives_mode() != "off" else "off",
+    }
+    doc["_id"] = mongo.db.uploaded_images.insert_one(doc).inserted_id
+    existing = schedule_finish_direct_upload(doc["_id"], object_name)
+    return {"ok": True, "image": existing or doc}
+
+
+def _finish_direct_upload(image_id, object_name: str) -> dict | None:
+    data, sha256, _ = _read_and_hash(io.BytesIO(get_storage_backend().read(object_name)))
+    try:
+        mongo.db.uploaded_images.update_one({"_id": image_id}, {"$set": {"sha256": sha256}})
+    except DuplicateKeyError:
+        # same content as an image the md5 check could not catch (e.g. a composite upload);
+        # keep the existing one and drop this record and its object
+        existing = _reuse_existing_image({"sha256": sha256})
+        if not existing:
+            raise
+        mongo.db.uploaded_images.delete_one({"_id": image_id})
+        invalidate_homepage_slots()
+        try:
+            delete_gcs_object(object_name)
+        except Exception:
+            logger.exception("Could not delete duplicate upload %s", object_name)
+        return existing
+
+    if _derivatives_mode() != "off":
+        _store_derivatives(image_id, object_name, data)
+    return None
+
+
+def _finish_direct_upload_in_background(app, image_id, object_name: str) -> None:
+    with app.app_context():
+        try:
+            _finish_direct_upload(image_id, object_name)
+        except Exception:
+            logger.exception("Finishing direct upload failed for %s", object_name)
+            if _derivatives_mode() != "off":
+                mongo.db.uploaded_images.update_one({"_id": image_id}, {"$set": {"variants_status": "failed"}})
+
+
+def schedule_finish_direct_upload(image_id, object_name: str) -> dict | None:
+    if _derivatives_mode() == "sync":
+        return _finish_direct_upload(image_id, object_name)
+
+    app = current_app._get_current_object()
+    _get_upload_pool().submit(_finish_direct_upload_in_background, app, image_id, object_name)
+    return None
+
+
+def delete_uploaded_image_objects(doc: dict) -> None:
+    if doc.get("object_name"):
+        delete_gcs_object(doc["object_name"])
+    for v in doc.get("variants") or []:
+        if v.get("object_name"):
+            delete_gcs_object(v["object_name"])
+
+
+def srcset_variants(doc: dict) -> dict:
+    variants = sorted(doc.get("variants") or [], key=lambda v: (v.get("format") or "", v.get("width") or 0))
+
+    srcset: dict[str, str] = {}
+    for fmt in DERIVATIVE_FORMATS:
+        entries = [f"{v['url']} {v['width']}w" for v in variants if v.get("format") == fmt]
+        if entries:
+            srcset[fmt] = ", ".join(entries)
+
+    return {
+        "variants": [
+            {"name": v.get("name"), "format": v.get("format"), "width": v.get("width"), "url": v.get("url")}
+            for v in variants
+        ],
+        "srcset": srcset,
+    }
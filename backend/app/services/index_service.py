@@ -0,0 +1,76 @@
+import os
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from app.extensions import mongo
+
+
+def _cart_ttl_seconds() -> int:
+    return int(float(os.getenv("CART_TTL_DAYS", "30")) * 86400)
+
+
+def mongo_index_specs() -> dict[str, list[IndexModel]]:
+    # homepage_slots and menu_meta are only read by _id, which Mongo always indexes
+    return {
+        "translations_cache": [
+            IndexModel([("key", ASCENDING)], name="key_1", unique=True),
+            IndexModel([("created_at", ASCENDING)], name="created_at_1"),
+            IndexModel([("last_used_at", ASCENDING)], name="last_used_at_1"),
+            IndexModel([("target_language", ASCENDING)], name="target_language_1"),
+        ],
+        "carts": [
+            IndexModel(
+                [("user_id", ASCENDING)],
+                name="user_id_1",
+                unique=True,
+                partialFilterExpression={"user_id": {"$exists": True}},
+            ),
+            IndexModel([("updated_at", ASCENDING)], name="updated_at_1", expireAfterSeconds=_cart_ttl_seconds()),
+        ],
+        "translation_leases": [
+            IndexModel([("expires_at", ASCENDING)], name="expires_at_1", expireAfterSeconds=0),
+        ],
+        "uploaded_images": [
+            IndexModel([("active", ASCENDING), ("uploaded_at", DESCENDING)], name="active_1_uploaded_at_-1"),
+            IndexModel(
+                [("sha256", ASCENDING)],
+                name="sha256_1",
+                unique=True,
+                partialFilterExpression={"sha256": {"$exists": True}},
+            ),
+            IndexModel([("md5", ASCENDING)], name="md5_1"),
+        ],
+    }
+
+
+def _index_matches(spec: dict, existing: dict) -> bool:
+    if list(spec["key"].items()) != [tuple(k) for k in existing.get("key", [])]:
+        return False
+    for option in ("unique", "expireAfterSeconds", "partialFilterExpression"):
+        if spec.get(option) != existing.get(option):
+            return False
+    return True
+
+
+def verify_mongo_indexes() -> dict[str, dict[str, list[str]]]:
+    report: dict[str, dict[str, list[str]]] = {}
+    for collection, models in mongo_index_specs().items():
+        existing = mongo.db[collection].index_information()
+        missing = []
+        mismatched = []
+        for model in models:
+            spec = model.document
+            current = existing.get(spec["name"])
+            if current is None:
+                missing.append(spec["name"])
+            elif not _index_matches(spec, current):
+                mismatched.append(spec["name"])
+        if missing or mismatched:
+            report[collection] = {"missing": missing, "mismatched": mismatched}
+    return report
+
+
+def ensure_mongo_indexes() -> dict[str, list[str]]:
+    created: dict[str, list[str]] = {}
+    for collection, models in mongo_index_specs().items():
+        if models:
+            created[collection] = mongo.db[collection].create_indexes(models)
+    return created
@@ -1,6 +1,24 @@
+import os
+import hashlib
+import threading
+import time
+from datetime import datetime, timezone
 from app.extensions import mongo
 from bson.objectid import ObjectId
-from app.services.translate_service import translate_texts
+from pymongo import ReturnDocument
+from app.services.translate_service import (
+    SUPPORTED_LANGS,
+    count_missing_translations,
+    flush_translation_cache_writes,
+    translate_texts,
+    translate_texts_nonblocking,
+)
+
+ENGLISH_LANGS = ("en", "en-gb", "en-us")
+
+_menu_cache_lock = threading.Lock()
+_menu_cache: dict[tuple, dict] = {}
+_menu_version_state = {"version": None, "checked_at": 0.0}
 
 
 def compute_availability(item: dict) -> dict:
@@ -114,7 +132,203 @@ def format_menu_item_box(item: dict) -> dict:
     }
 
 
+def _menu_cache_check_seconds() -> float:
+    return float(os.getenv("MENU_CACHE_CHECK_SECONDS", "5"))
+
+
+def _menu_cache_max_age_seconds() -> float:
+    return float(os.getenv("MENU_CACHE_MAX_AGE_SECONDS", "300"))
+
+
+def _normalize_language(target_language: str | None) -> str:
+    # unknown codes share the English entry instead of each getting a cache slot
+    # and a background translation job of its own
+    lang = (target_language or "en").strip().lower()
+    return lang if lang in SUPPORTED_LANGS else "en"
+
+
+def get_menu_version() -> int:
+    now = time.monotonic()
+    with _menu_cache_lock:
+        if now - _menu_version_state["checked_at"] < _menu_cache_check_seconds():
+            return _menu_version_state["version"]
+
+    doc = mongo.db.menu_meta.find_one({"_id": "menu"}, {"version": 1}) or {}
+    version = int(doc.get("version") or 0)
+
+    with _menu_cache_lock:
+        if version != _menu_version_state["version"]:
+            _menu_cache.clear()
+        _menu_version_state["version"] = version
+        _menu_version_state["checked_at"] = now
+
+    return version
+
+
+def bump_menu_version() -> int:
+    doc = mongo.db.menu_meta.find_one_and_update(
+        {"_id": "menu"},
+        {"$inc": {"version": 1}, "$set": {"updated_at": datetime.now(timezone.utc)}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    invalidate_menu_cache()
+    return int(doc.get("version") or 0)
+
+
+def invalidate_menu_cache() -> None:
+    with _menu_cache_lock:
+        _menu_cache.clear()
+        _menu_version_state["checked_at"] = 0.0
+
+
+def _menu_partial_max_age_seconds() -> float:
+    return float(os.getenv("MENU_PARTIAL_MAX_AGE_SECONDS", "2"))
+
+
+def _stale_while_revalidate() -> bool:
+    return os.getenv("MENU_TRANSLATION_MODE", "blocking").strip().lower() == "swr"
+
+
 def get_menu_boxes(group_by_category: bool = True, target_language: str | None = None):
+    return get_menu_boxes_with_status(group_by_category=group_by_category, target_language=target_language)[0]
+
+
+def get_menu_boxes_with_status(group_by_category: bool = True, target_language: str | None = None):
+    lang = _normalize_language(target_language)
+    version = get_menu_version()
+    key = (version, lang, bool(group_by_category))
+
+    now = time.monotonic()
+    with _menu_cache_lock:
+        entry = _menu_cache.get(key)
+        if entry:
+            max_age = _menu_partial_max_age_seconds() if entry["partial"] else _menu_cache_max_age_seconds()
+            if now - entry["built_at"] < max_age:
+                return entry["boxes"], entry["partial"]
+
+    boxes, partial = _build_menu_boxes(
+        group_by_category=group_by_category,
+        target_language=lang,
+        nonblocking=_stale_while_revalidate(),
+    )
+
+    with _menu_cache_lock:
+        if _menu_version_state["version"] == version:
+            _menu_cache[key] = {"boxes": boxes, "partial": partial, "built_at": now}
+
+    return boxes, partial
+
+
+def get_menu_variant_index() -> dict[tuple, dict]:
+    version = get_menu_version()
+    key = (version, "variant_index")
+
+    now = time.monotonic()
+    with _menu_cache_lock:
+        entry = _menu_cache.get(key)
+        if entry and now - entry["built_at"] < _menu_cache_max_age_seconds():
+            return entry["index"]
+
+    index: dict[tuple, dict] = {}
+    for item in get_menu_boxes(group_by_category=False):
+        for v in item.get("variants") or []:
+            index[(item.get("id"), v.get("id"))] = {
+                "name": item.get("title"),
+                "category": item.get("category"),
+                "variant_label": v.get("label"),
+                "unit_price": float(v.get("price") or 0.0),
+                "available": bool(v.get("available")),
+            }
+
+    with _menu_cache_lock:
+        if _menu_version_state["version"] == version:
+            _menu_cache[key] = {"index": index, "built_at": now}
+
+    return index
+
+
+def lookup_menu_variant(menu_item_id: str, variant_id: str) -> dict | None:
+    return get_menu_variant_index().get((menu_item_id, variant_id))
+
+
+def _collect_translatable(boxes: list[dict]) -> tuple[list[str], list[tuple]]:
+    to_translate = []
+    pointers = []  # (box_idx, field_name) or (box_idx, "variant", variant_idx)
+
+    for bi, b in enumerate(boxes):
+        title = (b.get("title") or "").strip()
+        desc = (b.get("description") or "").strip()
+        if title:
+            to_translate.append(title)
+            pointers.append((bi, "title"))
+        if desc:
+            to_translate.append(desc)
+            pointers.append((bi, "description"))
+
+        for vi, v in enumerate(b.get("variants") or []):
+            lab = (v.get("label") or "").strip()
+            if lab:
+                to_translate.append(lab)
+                pointers.append((bi, "variant", vi))
+
+    return to_translate, pointers
+
+
+def _apply_translations(boxes: list[dict], pointers: list[tuple], translated: list[str]) -> None:
+    for (ptr, tr) in zip(pointers, translated):
+        if len(ptr) == 2:
+            bi, field = ptr
+            boxes[bi][field] = tr
+        else:
+            bi, _, vi = ptr
+            boxes[bi]["variants"][vi]["label"] = tr
+
+
+def warm_menu_translations(languages, force: bool = False) -> dict:
+    english, _ = _build_menu_boxes(group_by_category=False)
+    texts, _ = _collect_translatable(english)
+    unique_texts = sorted(set(texts))
+    fingerprint = hashlib.sha256("\n".join(unique_texts).encode("utf-8")).hexdigest()
+
+    state = mongo.db.menu_meta.find_one({"_id": "translation_warmup"}) or {}
+    warmed = state.get("languages") or {}
+
+    report: dict[str, dict] = {}
+    for lang in languages:
+        lang = _normalize_language(lang)
+        if lang == "en":
+            continue
+
+        if not force and (warmed.get(lang) or {}).get("fingerprint") == fingerprint:
+            report[lang] = {"status": "unchanged", "strings": len(unique_texts)}
+            continue
+
+        translate_texts(unique_texts, target_language=lang, sync_persist=True)
+        flush_translation_cache_writes()
+
+        # only remember the fingerprint once every string is really in the cache,
+        # otherwise a failed write would make later runs skip this language
+        missing = count_missing_translations(unique_texts, lang)
+        if missing:
+            report[lang] = {"status": "incomplete", "strings": len(unique_texts), "missing": missing}
+            continue
+
+        mongo.db.menu_meta.update_one(
+            {"_id": "translation_warmup"},
+            {"$set": {f"languages.{lang}": {
+                "fingerprint": fingerprint,
+                "strings": len(unique_texts),
+                "warmed_at": datetime.now(timezone.utc),
+            }}},
+            upsert=True,
+        )
+        report[lang] = {"status": "warmed", "strings": len(unique_texts)}
+
+    return report
+
+
+def _build_menu_boxes(group_by_category: bool = True, target_language: str | None = None, nonblocking: bool = False):
     docs = list(mongo.db.menu_items.find())
 
     for d in docs:
@@ -127,38 +341,17 @@ def get_menu_boxes(group_by_category: bool = True, target_language: str | None =
     if target_language:
         target_language = target_language.strip().lower()
 
-    if target_language and target_language not in ("en", "en-gb", "en-us"):
-        to_translate = []
-        pointers = []  # (box_idx, field_name) or (box_idx, "variant", variant_idx)
-
-        for bi, b in enumerate(boxes):
-            title = (b.get("title") or "").strip()
-            desc = (b.get("description") or "").strip()
-            if title:
-                to_translate.append(title)
-                pointers.append((bi, "title"))
-            if desc:
-                to_translate.append(desc)
-                pointers.append((bi, "description"))
-
-            for vi, v in enumerate(b.get("variants") or []):
-                lab = (v.get("label") or "").strip()
-                if lab:
-                    to_translate.append(lab)
-                    pointers.append((bi, "variant", vi))
-
-        translated = translate_texts(to_translate, target_language=target_language)
-
-        for (ptr, tr) in zip(pointers, translated):
-            if len(ptr) == 2:
-                bi, field = ptr
-                boxes[bi][field] = tr
-            else:
-                bi, _, vi = ptr
-                boxes[bi]["variants"][vi]["label"] = tr
+    partial = False
+    if target_language and target_language not in ENGLISH_LANGS:
+        to_translate, pointers = _collect_translatable(boxes)
+        if nonblocking:
+            translated, partial = translate_texts_nonblocking(to_translate, target_language=target_language)
+        else:
+            translated = translate_texts(to_translate, target_language=target_language)
+        _apply_translations(boxes, pointers, translated)
 
     if not group_by_category:
-        return boxes
+        return boxes, partial
 
     grouped: dict[str, list[dict]] = {}
     for box in boxes:
@@ -188,16 +381,5 @@ def get_menu_boxes(group_by_category: bool = True, target_language: str | None =
         except ValueError:
             return (1, 9999)
 
-    return dict(sorted(grouped.items(), key=lambda kv: _category_sort_key(kv[0])))
-
-
-    def _category_sort_key(category_name: str):
-        try:
-            return (0, PREFERRED_CATEGORY_ORDER.index(category_name))
-        except ValueError:
-            return (1, 9999)
-
-    return dict(sorted(grouped.items(), key=lambda kv: _category_sort_key(kv[0])))
-
-
+    return dict(sorted(grouped.items(), key=lambda kv: _category_sort_key(kv[0]))), partial
 
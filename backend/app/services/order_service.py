@@ -1,14 +1,20 @@
 from uuid import uuid4
+from datetime import datetime, timezone
 from flask import session
 from flask_login import current_user
 from app.extensions import mongo
-from app.services.menu_service import get_menu_boxes
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.services.menu_service import get_menu_variant_index, lookup_menu_variant
 from decimal import Decimal
 from app.extensions import db
 from app.models.sql_order_model import Order, OrderItem
+from app.models.outbox_model import OutboxMessage
+from app.services.outbox_service import ORDER_CONFIRMATION_TOPIC, enqueue, wake_dispatcher
 import os
-import requests
+from sqlalchemy import func, insert
 from sqlalchemy.orm import joinedload
+from app.services.pagination_service import keyset_page
 
 
 
@@ -24,21 +30,7 @@ def _get_cart_key() -> dict:
 
 
 def _find_menu_item_and_variant(menu_item_id: str, variant_id: str) -> dict | None:
-    grouped = get_menu_boxes(group_by_category=True)
-    for _, items in grouped.items():
-        for item in items:
-            if item.get("id") != menu_item_id:
-                continue
-
-            for v in item.get("variants", []):
-                if v.get("id") == variant_id:
-                    return {
-                        "name": item.get("title"),
-                        "category": item.get("category"),
-                        "variant_label": v.get("label"),
-                        "unit_price": float(v.get("price") or 0.0),
-                    }
-    return None
+    return lookup_menu_variant(menu_item_id, variant_id)
 
 
 def get_cart() -> dict:
@@ -46,93 +38,88 @@ def get_cart() -> dict:
     cart = mongo.db.carts.find_one(cart_key)
 
     if not cart:
+        # virtual empty cart; the document is created by the first mutation
         cart = {**cart_key, "items": []}
-        mongo.db.carts.insert_one(cart)
 
     return cart
 
 
-def add_to_cart(menu_item_id: str, variant_id: str, qty: int = 1) -> None:
+def add_to_cart(menu_item_id: str, variant_id: str, qty: int = 1) -> dict:
     qty = max(1, int(qty))
 
-    cart_key = _get_cart_key()
-    cart = mongo.db.carts.find_one(cart_key)
-
-    if not cart:
-        cart = {**cart_key, "items": []}
-        mongo.db.carts.insert_one(cart)
-
     details = _find_menu_item_and_variant(menu_item_id, variant_id)
     if not details:
-        return
-
-    items = cart.get("items", []) or []
-
-    for line in items:
-        if line.get("menu_item_id") == menu_item_id and line.get("variant_id") == variant_id:
-            line["qty"] = int(line.get("qty", 0)) + qty
-            break
-    else:
-        items.append({
-            "_id": str(uuid4()),  # line id
-            "menu_item_id": menu_item_id,
-            "variant_id": variant_id,
-            "name": details["name"],
-            "category": details["category"],
-            "variant_label": details["variant_label"],
-            "unit_price": float(details["unit_price"]),
-            "qty": qty
-        })
-
-    mongo.db.carts.update_one(
-        cart_key,
-        {"$set": {"items": items}},
-        upsert=True
-    )
+        return {"ok": False, "error": "item_not_found"}
 
-
-def update_cart_line(line_id: str, qty: int) -> None:
-    qty = int(qty)
     cart_key = _get_cart_key()
-    cart = mongo.db.carts.find_one(cart_key) or {**cart_key, "items": []}
+    line_match = {"menu_item_id": menu_item_id, "variant_id": variant_id}
+    new_line = {
+        "_id": str(uuid4()),  # line id
+        **line_match,
+        "name": details["name"],
+        "category": details["category"],
+        "variant_label": details["variant_label"],
+        "unit_price": float(details["unit_price"]),
+        "qty": qty
+    }
 
-    items = cart.get("items", []) or []
-    new_items = []
+    for _ in range(2):
+        cart = mongo.db.carts.find_one_and_update(
+            {**cart_key, "items": {"$elemMatch": line_match}},
+            {"$inc": {"items.$[line].qty": qty}, "$set": {"updated_at": datetime.now(timezone.utc)}},
+            array_filters=[{"line.menu_item_id": menu_item_id, "line.variant_id": variant_id}],
+            return_document=ReturnDocument.AFTER,
+        )
+        if cart:
+            return {"ok": True, "cart": cart}
 
-    for line in items:
-        if line.get("_id") == line_id:
-            if qty > 0:
-                line["qty"] = qty
-                new_items.append(line)
-        else:
-            new_items.append(line)
+        try:
+            cart = mongo.db.carts.find_one_and_update(
+                {**cart_key, "items": {"$not": {"$elemMatch": line_match}}},
+                {"$push": {"items": new_line}, "$set": {"updated_at": datetime.now(timezone.utc)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            return {"ok": True, "cart": cart}
+        except DuplicateKeyError:
+            # a concurrent request created the cart or the line; retry the increment
+            continue
 
-    mongo.db.carts.update_one(
-        cart_key,
-        {"$set": {"items": new_items}},
-        upsert=True
-    )
+    return {"ok": False, "error": "cart_update_conflict"}
 
 
-def remove_cart_line(line_id: str) -> None:
-    cart_key = _get_cart_key()
-    cart = mongo.db.carts.find_one(cart_key) or {**cart_key, "items": []}
+def update_cart_line(line_id: str, qty: int) -> dict:
+    qty = int(qty)
+    if qty <= 0:
+        return remove_cart_line(line_id)
+
+    cart = mongo.db.carts.find_one_and_update(
+        {**_get_cart_key(), "items._id": line_id},
+        {"$set": {"items.$[line].qty": qty, "updated_at": datetime.now(timezone.utc)}},
+        array_filters=[{"line._id": line_id}],
+        return_document=ReturnDocument.AFTER,
+    )
+    if not cart:
+        return {"ok": False, "error": "item_not_found"}
+    return {"ok": True, "cart": cart}
 
-    items = [l for l in (cart.get("items", []) or []) if l.get("_id") != line_id]
 
-    mongo.db.carts.update_one(
-        cart_key,
-        {"$set": {"items": items}},
-        upsert=True
+def remove_cart_line(line_id: str) -> dict:
+    cart = mongo.db.carts.find_one_and_update(
+        {**_get_cart_key(), "items._id": line_id},
+        {"$pull": {"items": {"_id": line_id}}, "$set": {"updated_at": datetime.now(timezone.utc)}},
+        return_document=ReturnDocument.AFTER,
     )
+    if not cart:
+        return {"ok": False, "error": "item_not_found"}
+    return {"ok": True, "cart": cart}
 
 
 def clear_cart() -> None:
     cart_key = _get_cart_key()
     mongo.db.carts.update_one(
         cart_key,
-        {"$set": {"items": []}},
-        upsert=True
+        {"$set": {"items": [], "updated_at": datetime.now(timezone.utc)}},
     )
 
 
@@ -158,13 +145,35 @@ def cart_totals(cart: dict) -> tuple[list[dict], float]:
 
     return cart_items, total
 
+def _reprice_cart(cart: dict) -> dict:
+    index = get_menu_variant_index()
+
+    lines = []
+    for line in cart.get("items", []) or []:
+        details = index.get((line.get("menu_item_id"), line.get("variant_id")))
+        if not details:
+            raise ValueError(f"{line.get('name') or 'An item'} is no longer on the menu.")
+
+        lines.append({
+            **line,
+            "name": details["name"],
+            "category": details["category"],
+            "variant_label": details["variant_label"],
+            "unit_price": float(details["unit_price"]),
+        })
+
+    return {**cart, "items": lines}
+
+
 def checkout_to_sql_order() -> int:
-    cart = get_cart()
+    cart = _reprice_cart(get_cart())
     items, total = cart_totals(cart)
 
     if not items:
         raise ValueError("Your cart is empty.")
 
+    lines_by_id = {line.get("_id"): line for line in cart.get("items", []) or []}
+
     order = Order(
         user_id=int(current_user.get_id()),
         status="created",
@@ -172,51 +181,66 @@ def checkout_to_sql_order() -> int:
         total_amount=Decimal(str(total)).quantize(Decimal("0.01")),
     )
     db.session.add(order)
-    db.session.flush()  
+    db.session.flush()
 
+    rows = []
     for line in items:
         unit = Decimal(str(line["unit_price"])).quantize(Decimal("0.01"))
         qty = int(line["qty"])
         line_total = (unit * qty).quantize(Decimal("0.01"))
+        source = lines_by_id.get(line["line_id"], {})
+
+        rows.append({
+            "order_id": order.id,
+            "menu_item_id": str(source.get("menu_item_id")),
+            "variant_id": str(source.get("variant_id")),
+            "name": line["name"],
+            "variant_label": line["variant_label"],
+            "unit_price": unit,
+            "qty": qty,
+            "line_total": line_total,
+        })
 
-        oi = OrderItem(
-            order_id=order.id,
-            menu_item_id=str(cart_line_lookup(cart, line["line_id"]).get("menu_item_id")),
-            variant_id=str(cart_line_lookup(cart, line["line_id"]).get("variant_id")),
-            name=line["name"],
-            variant_label=line["variant_label"],
-            unit_price=unit,
-            qty=qty,
-            line_total=line_total,
-        )
-        db.session.add(oi)
-
+    db.session.execute(insert(OrderItem), rows)
+    _enqueue_order_confirmation(order, rows, user_email=getattr(current_user, "email", None))
     db.session.commit()
-    _notify_order_confirmation(order, order.order_items)
+    wake_dispatcher()
     clear_cart()
     return order.id
 
 
-def cart_line_lookup(cart: dict, line_id: str) -> dict:
-    for line in cart.get("items", []) or []:
-        if line.get("_id") == line_id:
-            return line
-    return {}
+def list_order_history(user_id: int, limit: int = 20, cursor: str | None = None) -> dict:
+    query = (
+        db.session.query(
+            Order.id,
+            Order.status,
+            Order.currency,
+            Order.total_amount,
+            Order.created_at,
+            func.count(OrderItem.id).label("items_count"),
+            func.coalesce(func.sum(OrderItem.qty), 0).label("items_qty"),
+        )
+        .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+        .filter(Order.user_id == int(user_id))
+        .group_by(Order.id)
+    )
 
-def _notify_order_confirmation(order, order_items) -> bool:
-    url = os.getenv("ORDER_CONFIRMATION_URL", "").strip()
-    if not url:
-        return False
+    rows, next_cursor = keyset_page(query, Order.created_at, Order.id, cursor, int(limit))
+    return {"orders": rows, "next_cursor": next_cursor}
 
-    user_email = None
-    if getattr(order, "user", None) is not None:
-        user_email = getattr(order.user, "email", None)
 
-    if not user_email:
-        try:
-            user_email = getattr(current_user, "email", None)
-        except Exception:
-            user_email = None
+def _order_item_field(item, name: str):
+    if isinstance(item, dict):
+        return item.get(name)
+    return getattr(item, name, None)
+
+
+def _enqueue_order_confirmation(order, order_items, user_email: str | None = None) -> OutboxMessage | None:
+    if not os.getenv("ORDER_CONFIRMATION_URL", "").strip():
+        return None
+
+    if not user_email and getattr(order, "user", None) is not None:
+        user_email = getattr(order.user, "email", None)
 
     payload = {
         "order_id": order.id,
@@ -225,21 +249,17 @@ def _notify_order_confirmation(order, order_items) -> bool:
         "currency": order.currency,
         "items": [
             {
-                "name": it.name,
-                "variant_label": it.variant_label,
-                "qty": int(it.qty or 0),
-                "unit_price": float(it.unit_price or 0),
-                "line_total": float(it.line_total or 0),
+                "name": _order_item_field(it, "name"),
+                "variant_label": _order_item_field(it, "variant_label"),
+                "qty": int(_order_item_field(it, "qty") or 0),
+                "unit_price": float(_order_item_field(it, "unit_price") or 0),
+                "line_total": float(_order_item_field(it, "line_total") or 0),
             }
             for it in (order_items or [])
         ],
     }
 
-    try:
-        resp = requests.post(url, json=payload, timeout=5)
-        return resp.status_code < 400
-    except Exception:
-        return False
+    return enqueue(ORDER_CONFIRMATION_TOPIC, payload, order_id=order.id)
 
 
 def notify_order_confirmation_by_order_id(order_id: int) -> dict:
@@ -255,5 +275,7 @@ def notify_order_confirmation_by_order_id(order_id: int) -> dict:
     if not order:
         return {"ok": False, "error": "order_not_found"}
 
-    ok = _notify_order_confirmation(order, order.order_items)
-    return {"ok": bool(ok)}
+    msg = _enqueue_order_confirmation(order, order.order_items)
+    db.session.commit()
+    wake_dispatcher()
+    return {"ok": True, "queued": True, "outbox_id": msg.id}
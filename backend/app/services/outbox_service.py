@@ -0,0 +1,191 @@
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+import requests
+from flask import current_app
+from app.extensions import db
+from app.models.outbox_model import OutboxMessage
+
+ORDER_CONFIRMATION_TOPIC = "order_confirmation"
+
+_wake_event = threading.Event()
+_dispatcher_thread: threading.Thread | None = None
+
+
+def _max_attempts() -> int:
+    return int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+
+
+def _backoff_seconds(attempts: int) -> float:
+    base = float(os.getenv("OUTBOX_BACKOFF_BASE_SECONDS", "5"))
+    cap = float(os.getenv("OUTBOX_BACKOFF_MAX_SECONDS", "900"))
+    return min(cap, base * (2 ** max(0, attempts - 1)))
+
+
+def _poll_seconds() -> float:
+    return float(os.getenv("OUTBOX_POLL_SECONDS", "10"))
+
+
+def _claim_seconds() -> float:
+    return float(os.getenv("OUTBOX_CLAIM_SECONDS", "300"))
+
+
+def _order_confirmation_url() -> str:
+    return os.getenv("ORDER_CONFIRMATION_URL", "").strip()
+
+
+def enqueue(topic: str, payload: dict, order_id: int | None = None) -> OutboxMessage:
+    msg = OutboxMessage(topic=topic, order_id=order_id, payload=payload)
+    db.session.add(msg)
+    return msg
+
+
+def wake_dispatcher() -> None:
+    _wake_event.set()
+
+
+def _order_confirmation_batch_size() -> int:
+    return max(1, int(os.getenv("ORDER_CONFIRMATION_BATCH_SIZE", "1")))
+
+
+def _post_order_confirmation(url: str, msg: OutboxMessage) -> str | None:
+    try:
+        resp = requests.post(url, json=msg.payload, timeout=5)
+    except Exception as e:
+        return repr(e)
+    if resp.status_code >= 400:
+        return f"HTTP {resp.status_code}"
+    return None
+
+
+def _post_order_confirmation_batch(url: str, batch: list[OutboxMessage]) -> dict[int, str | None]:
+    try:
+        resp = requests.post(url, json=[m.payload for m in batch], timeout=10)
+        results = (resp.json() or {}).get("results") if resp.status_code in (200, 207, 500) else None
+    except Exception as e:
+        return {m.id: repr(e) for m in batch}
+
+    if not isinstance(results, list) or len(results) != len(batch):
+        return {m.id: f"HTTP {resp.status_code}" for m in batch}
+
+    return {
+        m.id: None if r.get("ok") else (r.get("error") or "batch_item_failed")
+        for m, r in zip(batch, results)
+    }
+
+
+def _send_order_confirmations(messages: list[OutboxMessage]) -> dict[int, str | None]:
+    url = _order_confirmation_url()
+    if not url:
+        return {m.id: "missing_ORDER_CONFIRMATION_URL" for m in messages}
+
+    batch_size = _order_confirmation_batch_size()
+    if batch_size == 1:
+        return {m.id: _post_order_confirmation(url, m) for m in messages}
+
+    outcome: dict[int, str | None] = {}
+    for start in range(0, len(messages), batch_size):
+        outcome.update(_post_order_confirmation_batch(url, messages[start:start + batch_size]))
+    return outcome
+
+
+SENDERS = {
+    ORDER_CONFIRMATION_TOPIC: _send_order_confirmations,
+}
+
+
+def _claim_due_messages(limit: int) -> list[OutboxMessage]:
+    now = datetime.now(timezone.utc)
+    messages = (
+        OutboxMessage.query
+        .filter(OutboxMessage.status == "pending", OutboxMessage.next_attempt_at <= now)
+        .order_by(OutboxMessage.next_attempt_at, OutboxMessage.id)
+        .limit(int(limit))
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+    # push the claimed rows into the future and commit, so the row locks are released
+    # before any HTTP call; if this dispatcher dies they become due again after the claim
+    claimed_until = now + timedelta(seconds=_claim_seconds())
+    for msg in messages:
+        msg.next_attempt_at = claimed_until
+    db.session.commit()
+    return messages
+
+
+def _record_failure(msg: OutboxMessage, error: str) -> None:
+    msg.attempts = int(msg.attempts or 0) + 1
+    msg.last_error = str(error)[:2000]
+    if msg.attempts >= _max_attempts():
+        msg.status = "failed"
+    else:
+        msg.next_attempt_at = datetime.now(timezone.utc) + timedelta(seconds=_backoff_seconds(msg.attempts))
+
+
+def dispatch_pending(limit: int = 50) -> dict:
+    messages = _claim_due_messages(limit)
+
+    by_topic: dict[str, list[OutboxMessage]] = {}
+    for msg in messages:
+        by_topic.setdefault(msg.topic, []).append(msg)
+
+    sent = 0
+    failed = 0
+    for topic, batch in by_topic.items():
+        sender = SENDERS.get(topic)
+        if sender is None:
+            outcome = {m.id: f"no sender for topic {topic!r}" for m in batch}
+        else:
+            outcome = sender(batch)
+
+        now = datetime.now(timezone.utc)
+        for msg in batch:
+            error = outcome.get(msg.id, "no_result")
+            if error:
+                _record_failure(msg, error)
+                failed += 1
+                continue
+
+            msg.status = "sent"
+            msg.sent_at = now
+            msg.attempts = int(msg.attempts or 0) + 1
+            sent += 1
+
+    db.session.commit()
+    return {"claimed": len(messages), "sent": sent, "failed": failed}
+
+
+def run_dispatcher(app, stop_event: threading.Event | None = None) -> None:
+    stop_event = stop_event or threading.Event()
+    while not stop_event.is_set():
+        with app.app_context():
+            try:
+                result = dispatch_pending()
+            except Exception:
+                db.session.rollback()
+                current_app.logger.exception("Outbox dispatch failed")
+                result = {"claimed": 0}
+            finally:
+                db.session.remove()
+
+        if result.get("claimed"):
+            continue
+
+        _wake_event.wait(timeout=_poll_seconds())
+        _wake_event.clear()
+
+
+def start_dispatcher_thread(app) -> threading.Thread:
+    global _dispatcher_thread
+    if _dispatcher_thread is not None and _dispatcher_thread.is_alive():
+        return _dispatcher_thread
+
+    _dispatcher_thread = threading.Thread(
+        target=run_dispatcher,
+        args=(app,),
+        name="outbox-dispatcher",
+        daemon=True,
+    )
+    _dispatcher_thread.start()
+    return _dispatcher_thread
@@ -0,0 +1,218 @@
+import base64
+import hashlib
+import os
+import threading
+from abc import ABC, abstractmethod
+from datetime import timedelta
+from flask import current_app, url_for
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from app.services.gcp_clients import get_client
+
+
+class StorageBackendError(RuntimeError):
+    pass
+
+
+class StorageBackend(ABC):
+    name = "base"
+
+    @abstractmethod
+    def public_url(self, object_name: str) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    def upload_bytes(self, object_name: str, data: bytes, content_type: str) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, object_name: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def stat(self, object_name: str) -> dict | None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def read(self, object_name: str) -> bytes:
+        raise NotImplementedError
+
+    @abstractmethod
+    def signed_upload(self, object_name: str, content_type: str, expires_seconds: int,
+                      resumable: bool = False, size: int | None = None, origin: str | None = None) -> dict:
+        raise NotImplementedError
+
+
+class GcsStorageBackend(StorageBackend):
+    name = "gcs"
+
+    def __init__(self):
+        self._signing_credentials = None
+        self._signing_lock = threading.Lock()
+
+    @staticmethod
+    def _bucket_name() -> str:
+        b = current_app.config.get("GCS_BUCKET")
+        if not b:
+            raise RuntimeError("Missing GCS_BUCKET configuration.")
+        return b
+
+    @staticmethod
+    def _get_client():
+        return get_client("storage")
+
+    def _bucket(self):
+        return self._get_client().bucket(self._bucket_name())
+
+    def public_url(self, object_name: str) -> str:
+        return f"https://storage.googleapis.com/{self._bucket_name()}/{object_name}"
+
+    def upload_bytes(self, object_name: str, data: bytes, content_type: str) -> str:
+        self._bucket().blob(object_name).upload_from_string(data, content_type=content_type)
+        return self.public_url(object_name)
+
+    def delete(self, object_name: str) -> None:
+        self._bucket().blob(object_name).delete()
+
+    def stat(self, object_name: str) -> dict | None:
+        blob = self._bucket().get_blob(object_name)
+        if blob is None:
+            return None
+        # composite objects carry no md5, only crc32c
+        md5 = base64.b64decode(blob.md5_hash).hex() if blob.md5_hash else None
+        return {"size": blob.size, "content_type": blob.content_type, "md5": md5}
+
+    def read(self, object_name: str) -> bytes:
+        return self._bucket().blob(object_name).download_as_bytes()
+
+    def _signing_kwargs(self) -> dict:
+        import google.auth
+        import google.auth.transport.requests
+
+        with self._signing_lock:
+            if self._signing_credentials is None:
+                self._signing_credentials, _ = google.auth.default(
+                    scopes=["https://www.googleapis.com/auth/cloud-platform"],
+                )
+            credentials = self._signing_credentials
+
+            if hasattr(credentials, "sign_bytes") and getattr(credentials, "signer_email", None):
+                return {"credentials": credentials}
+
+            # runtime service accounts on GAE/Cloud Run have no private key, so sign through IAM
+            if not credentials.valid:
+                credentials.refresh(google.auth.transport.requests.Request())
+            return {"service_account_email": credentials.service_account_email, "access_token": credentials.token}
+
+    def signed_upload(self, object_name: str, content_type: str, expires_seconds: int,
+                      resumable: bool = False, size: int | None = None, origin: str | None = None) -> dict:
+        blob = self._bucket().blob(object_name)
+
+        if resumable:
+            session_url = blob.create_resumable_upload_session(content_type=content_type, size=size, origin=origin)
+            return {"method": "PUT", "url": session_url, "headers": {}, "resumable": True}
+
+        url = blob.generate_signed_url(
+            version="v4",
+            expiration=timedelta(seconds=expires_seconds),
+            method="PUT",
+            content_type=content_type,
+            **self._signing_kwargs(),
+        )
+        return {"method": "PUT", "url": url, "headers": {"Content-Type": content_type}, "resumable": False}
+
+
+class LocalStorageBackend(StorageBackend):
+    name = "local"
+
+    def __init__(self, root: str, base_url: str = "/api/storage/local"):
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip("/")
+
+    def path_for(self, object_name: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, object_name))
+        if not path.startswith(self.root + os.sep):
+            raise StorageBackendError(f"object name escapes storage root: {object_name!r}")
+        return path
+
+    def public_url(self, object_name: str) -> str:
+        return f"{self.base_url}/{object_name}"
+
+    def upload_bytes(self, object_name: str, data: bytes, content_type: str) -> str:
+        path = self.path_for(object_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        with open(path + ".content-type", "w") as f:
+            f.write(content_type or "")
+        return self.public_url(object_name)
+
+    def delete(self, object_name: str) -> None:
+        path = self.path_for(object_name)
+        for p in (path, path + ".content-type"):
+            if os.path.exists(p):
+                os.remove(p)
+
+    def stat(self, object_name: str) -> dict | None:
+        path = self.path_for(object_name)
+        if not os.path.isfile(path):
+            return None
+        content_type = None
+        if os.path.exists(path + ".content-type"):
+            with open(path + ".content-type") as f:
+                content_type = f.read() or None
+
+        md5 = hashlib.md5()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                md5.update(chunk)
+        return {"size": os.path.getsize(path), "content_type": content_type, "md5": md5.hexdigest()}
+
+    def read(self, object_name: str) -> bytes:
+        with open(self.path_for(object_name), "rb") as f:
+            return f.read()
+
+    @staticmethod
+    def _serializer() -> URLSafeTimedSerializer:
+        return URLSafeTimedSerializer(current_app.config["SECRET_KEY"], salt="local-storage-upload")
+
+    def signed_upload(self, object_name: str, content_type: str, expires_seconds: int,
+                      resumable: bool = False, size: int | None = None, origin: str | None = None) -> dict:
+        token = self._serializer().dumps({"object_name": object_name, "content_type": content_type})
+        url = url_for("api.api_local_storage_upload", token=token, _external=True)
+        return {"method": "PUT", "url": url, "headers": {"Content-Type": content_type}, "resumable": False}
+
+    def verify_upload_token(self, token: str, max_age: int) -> dict | None:
+        try:
+            return self._serializer().loads(token, max_age=max_age)
+        except BadSignature:
+            return None
+
+
+_backend: StorageBackend | None = None
+_backend_lock = threading.Lock()
+
+
+def _build_backend() -> StorageBackend:
+    name = os.getenv("STORAGE_BACKEND", "gcs").strip().lower()
+    if name == "gcs":
+        return GcsStorageBackend()
+    if name == "local":
+        return LocalStorageBackend(
+            root=os.getenv("LOCAL_STORAGE_ROOT", os.path.join(os.getcwd(), "local_storage")),
+            base_url=os.getenv("LOCAL_STORAGE_BASE_URL", "/api/storage/local"),
+        )
+    raise RuntimeError(f"Unknown STORAGE_BACKEND {name!r}; expected 'gcs' or 'local'.")
+
+
+def get_storage_backend() -> StorageBackend:
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = _build_backend()
+        return _backend
+
+
+def set_storage_backend(backend: StorageBackend | None) -> None:
+    global _backend
+    with _backend_lock:
+        _backend = backend
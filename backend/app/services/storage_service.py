@@ -1,17 +1,9 @@
 import uuid
-from google.cloud import storage
-from flask import current_app
+from app.services.storage_backends import get_storage_backend
 
 ALLOWED_EXTS = {".jpg", ".jpeg", ".png", ".webp"}
 
 
-def _bucket_name() -> str:
-    b = current_app.config.get("GCS_BUCKET")
-    if not b:
-        raise RuntimeError("Missing GCS_BUCKET configuration.")
-    return b
-
-
 def _safe_extension(filename: str | None) -> str:
     name = (filename or "").strip().lower()
     if "." in name:
@@ -21,26 +13,32 @@ def _safe_extension(filename: str | None) -> str:
     return ".jpg"
 
 
-def upload_menu_image(file_storage, folder: str = "menu") -> dict:
-    client = storage.Client()
-    bucket_name = _bucket_name()
-    bucket = client.bucket(bucket_name)
-
-    ext = _safe_extension(getattr(file_storage, "filename", None))
-    object_name = f"{folder}/{uuid.uuid4().hex}{ext}"
-
-    blob = bucket.blob(object_name)
-    blob.upload_from_file(
-        file_storage.stream,
-        content_type=getattr(file_storage, "mimetype", "image/jpeg"),
-        rewind=True,
-    )
+def new_object_name(filename: str | None, folder: str = "menu") -> str:
+    return f"{folder}/{uuid.uuid4().hex}{_safe_extension(filename)}"
+
+
+def public_url(object_name: str) -> str:
+    return get_storage_backend().public_url(object_name)
+
 
-    url = f"https://storage.googleapis.com/{bucket_name}/{object_name}"
+def upload_bytes(object_name: str, data: bytes, content_type: str) -> str:
+    return get_storage_backend().upload_bytes(object_name, data, content_type)
+
+
+def upload_menu_image_bytes(data: bytes, filename: str | None, content_type: str | None, folder: str = "menu") -> dict:
+    object_name = new_object_name(filename, folder)
+    url = upload_bytes(object_name, data, content_type or "image/jpeg")
     return {"url": url, "object_name": object_name}
 
 
+def upload_menu_image(file_storage, folder: str = "menu") -> dict:
+    return upload_menu_image_bytes(
+        file_storage.stream.read(),
+        getattr(file_storage, "filename", None),
+        getattr(file_storage, "mimetype", None),
+        folder=folder,
+    )
+
+
 def delete_gcs_object(object_name: str) -> None:
-    client = storage.Client()
-    bucket = client.bucket(_bucket_name())
-    bucket.blob(object_name).delete()
+    get_storage_backend().delete(object_name)
@@ -0,0 +1,106 @@
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import List, Optional
+from app.services.gcp_clients import get_client
+
+
+class TranslateBackendError(RuntimeError):
+    pass
+
+
+class TranslateBackend(ABC):
+    name = "base"
+
+    @abstractmethod
+    def translate(self, texts: List[str], target_language: str, source_language: Optional[str] = None) -> List[str]:
+        raise NotImplementedError
+
+
+class GoogleTranslateBackend(TranslateBackend):
+    name = "google"
+
+    @staticmethod
+    def _project_id() -> str:
+        pid = os.getenv("GOOGLE_CLOUD_PROJECT") or os.getenv("GCLOUD_PROJECT")
+        if not pid:
+            raise RuntimeError("Missing GOOGLE_CLOUD_PROJECT environment variable.")
+        return pid
+
+    @staticmethod
+    def _location() -> str:
+        return os.getenv("TRANSLATE_LOCATION", "global")
+
+    @staticmethod
+    def _get_client():
+        return get_client("translate")
+
+    def translate(self, texts: List[str], target_language: str, source_language: Optional[str] = None) -> List[str]:
+        req = {
+            "parent": f"projects/{self._project_id()}/locations/{self._location()}",
+            "contents": texts,
+            "target_language_code": target_language,
+        }
+        if source_language:
+            req["source_language_code"] = source_language
+
+        resp = self._get_client().translate_text(request=req)
+        return [tr.translated_text for tr in resp.translations]
+
+
+class LocalTranslateBackend(TranslateBackend):
+    name = "local"
+
+    def __init__(self, latency_ms: float = 0.0, failure_rate: float = 0.0, seed: int = 0):
+        self.latency_ms = max(0.0, float(latency_ms))
+        self.failure_rate = min(1.0, max(0.0, float(failure_rate)))
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.characters = 0
+
+    def translate(self, texts: List[str], target_language: str, source_language: Optional[str] = None) -> List[str]:
+        with self._lock:
+            self.calls += 1
+            self.characters += sum(len(t) for t in texts)
+            fail = self.failure_rate > 0 and self._rng.random() < self.failure_rate
+
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        if fail:
+            raise TranslateBackendError("injected local translation failure")
+
+        return [f"[{target_language}] {t}" for t in texts]
+
+
+_backend: TranslateBackend | None = None
+_backend_lock = threading.Lock()
+
+
+def _build_backend() -> TranslateBackend:
+    name = os.getenv("TRANSLATE_BACKEND", "google").strip().lower()
+    if name == "google":
+        return GoogleTranslateBackend()
+    if name == "local":
+        return LocalTranslateBackend(
+            latency_ms=float(os.getenv("TRANSLATE_LOCAL_LATENCY_MS", "0")),
+            failure_rate=float(os.getenv("TRANSLATE_LOCAL_FAILURE_RATE", "0")),
+            seed=int(os.getenv("TRANSLATE_LOCAL_SEED", "0")),
+        )
+    raise RuntimeError(f"Unknown TRANSLATE_BACKEND {name!r}; expected 'google' or 'local'.")
+
+
+def get_translate_backend() -> TranslateBackend:
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = _build_backend()
+        return _backend
+
+
+def set_translate_backend(backend: TranslateBackend | None) -> None:
+    global _backend
+    with _backend_lock:
+        _backend = backend
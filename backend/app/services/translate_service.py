@@ -1,20 +1,104 @@
 import os
 import hashlib
-from datetime import datetime, timezone
+import logging
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from typing import Iterable, List, Dict, Optional
-from google.cloud import translate_v3 as translate
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 from app.extensions import mongo
+from app.services.translate_backends import get_translate_backend
 
+logger = logging.getLogger(__name__)
 
-def _project_id() -> str:
-    pid = os.getenv("GOOGLE_CLOUD_PROJECT") or os.getenv("GCLOUD_PROJECT")
-    if not pid:
-        raise RuntimeError("Missing GOOGLE_CLOUD_PROJECT environment variable.")
-    return pid
+SUPPORTED_LANGS = {
+    "en": "English",
+    "it": "Italiano",
+    "fr": "Français",
+    "es": "Español",
+    "de": "Deutsch",
+}
 
+_cache_writer: ThreadPoolExecutor | None = None
+_cache_writer_lock = threading.Lock()
 
-def _location() -> str:
-    return os.getenv("TRANSLATE_LOCATION", "global")
+_api_pool_lock = threading.Lock()
+_api_pool: ThreadPoolExecutor | None = None
+
+_background_translator: ThreadPoolExecutor | None = None
+_background_lock = threading.Lock()
+_background_pending: set[str] = set()
+
+_inflight: Dict[str, threading.Event] = {}
+_inflight_lock = threading.Lock()
+
+_usage_lock = threading.Lock()
+_usage_hits: Dict[str, int] = {}
+_usage_stats: Dict[str, Dict[str, int]] = {}
+_usage_state = {"last_flush": time.monotonic()}
+
+
+def _chunk_max_items() -> int:
+    return max(1, int(os.getenv("TRANSLATE_CHUNK_MAX_ITEMS", "128")))
+
+
+def _chunk_max_chars() -> int:
+    return max(1, int(os.getenv("TRANSLATE_CHUNK_MAX_CHARS", "25000")))
+
+
+def _api_max_workers() -> int:
+    return max(1, int(os.getenv("TRANSLATE_MAX_WORKERS", "4")))
+
+
+def _get_api_pool() -> ThreadPoolExecutor:
+    global _api_pool
+    with _api_pool_lock:
+        if _api_pool is None:
+            _api_pool = ThreadPoolExecutor(max_workers=_api_max_workers(), thread_name_prefix="translate-api")
+        return _api_pool
+
+
+def _chunk_texts(texts: List[str]) -> List[List[str]]:
+    max_items = _chunk_max_items()
+    max_chars = _chunk_max_chars()
+
+    chunks: List[List[str]] = []
+    current: List[str] = []
+    current_chars = 0
+    for t in texts:
+        if current and (len(current) >= max_items or current_chars + len(t) > max_chars):
+            chunks.append(current)
+            current = []
+            current_chars = 0
+        current.append(t)
+        current_chars += len(t)
+
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _translate_chunk(chunk: List[str], target_language: str, source_language: Optional[str]) -> List[str]:
+    return get_translate_backend().translate(chunk, target_language, source_language)
+
+
+def _translate_via_api(texts: List[str], target_language: str, source_language: Optional[str]) -> List[str]:
+    chunks = _chunk_texts(texts)
+    if len(chunks) == 1:
+        return _translate_chunk(chunks[0], target_language, source_language)
+
+    pool = _get_api_pool()
+    futures = [pool.submit(_translate_chunk, c, target_language, source_language) for c in chunks]
+
+    translated: List[str] = []
+    for f in futures:
+        translated.extend(f.result())
+    return translated
 
 
 def _hash_key(text: str, target_language: str, source_language: Optional[str]) -> str:
@@ -22,35 +106,239 @@ def _hash_key(text: str, target_language: str, source_language: Optional[str]) -
     return hashlib.sha256(base.encode("utf-8")).hexdigest()
 
 
-def _ensure_indexes() -> None:
-    mongo.db.translations_cache.create_index("key", unique=True)
-    mongo.db.translations_cache.create_index("created_at")
+class _TranslationLRU:
+    def __init__(self, max_size: int):
+        self.max_size = max(0, int(max_size))
+        self._data: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys: List[str]) -> Dict[str, str]:
+        found: Dict[str, str] = {}
+        with self._lock:
+            for k in keys:
+                value = self._data.get(k)
+                if value is None:
+                    self.misses += 1
+                    continue
+                self._data.move_to_end(k)
+                found[k] = value
+                self.hits += 1
+        return found
+
+    def put_many(self, items: Dict[str, str]) -> None:
+        if self.max_size == 0:
+            return
+        with self._lock:
+            for k, v in items.items():
+                if not v:
+                    continue
+                self._data[k] = v
+                self._data.move_to_end(k)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / total) if total else 0.0,
+            }
+
+
+_lru = _TranslationLRU(int(os.getenv("TRANSLATION_LRU_SIZE", "5000")))
+
+
+def translation_lru_stats() -> dict:
+    return _lru.stats()
+
+
+def _cache_write_mode() -> str:
+    return os.getenv("TRANSLATION_CACHE_WRITE_MODE", "background").strip().lower()
+
+
+def _get_cache_writer() -> ThreadPoolExecutor:
+    global _cache_writer
+    with _cache_writer_lock:
+        if _cache_writer is None:
+            _cache_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="translations-cache-writer")
+        return _cache_writer
+
+
+def _write_cache_docs(collection, docs: List[dict]) -> bool:
+    ops = [UpdateOne({"key": d["key"]}, {"$setOnInsert": d}, upsert=True) for d in docs]
+    try:
+        collection.bulk_write(ops, ordered=False)
+    except BulkWriteError as e:
+        # concurrent workers may upsert the same key; anything else is worth logging
+        errors = [err for err in e.details.get("writeErrors", []) if err.get("code") != 11000]
+        if errors:
+            logger.warning("translations_cache bulk write failed: %s", errors[:3])
+            return False
+    except Exception:
+        logger.exception("translations_cache bulk write failed")
+        return False
+    return True
+
+
+def _usage_flush_seconds() -> float:
+    return float(os.getenv("TRANSLATION_USAGE_FLUSH_SECONDS", "60"))
+
+
+def _record_usage(target_language: str, cleaned: List[str], keys: List[str], cache_map: Dict[str, str]) -> None:
+    with _usage_lock:
+        stats = _usage_stats.setdefault(
+            target_language,
+            {"hits": 0, "misses": 0, "chars_saved": 0, "chars_translated": 0},
+        )
+        for t, k in zip(cleaned, keys):
+            if not t:
+                continue
+            if cache_map.get(k):
+                _usage_hits[k] = _usage_hits.get(k, 0) + 1
+                stats["hits"] += 1
+                stats["chars_saved"] += len(t)
+            else:
+                stats["misses"] += 1
+                stats["chars_translated"] += len(t)
+
+        due = (
+            time.monotonic() - _usage_state["last_flush"] >= _usage_flush_seconds()
+            or len(_usage_hits) >= 1000
+        )
+
+    if due:
+        flush_translation_usage()
+
+
+def _write_usage(hits: Dict[str, int], stats: Dict[str, Dict[str, int]], now: datetime) -> None:
+    try:
+        if hits:
+            mongo.db.translations_cache.bulk_write([
+                UpdateOne({"key": k}, {"$inc": {"hit_count": n}, "$set": {"last_used_at": now}})
+                for k, n in hits.items()
+            ], ordered=False)
+        if stats:
+            mongo.db.translation_stats.bulk_write([
+                UpdateOne({"_id": lang}, {"$inc": counters, "$set": {"updated_at": now}}, upsert=True)
+                for lang, counters in stats.items()
+            ], ordered=False)
+    except Exception:
+        logger.exception("Could not flush translation usage counters")
+
+
+def flush_translation_usage(sync: bool = False) -> None:
+    with _usage_lock:
+        hits, stats = dict(_usage_hits), {lang: dict(c) for lang, c in _usage_stats.items()}
+        _usage_hits.clear()
+        _usage_stats.clear()
+        _usage_state["last_flush"] = time.monotonic()
+
+    if not hits and not stats:
+        return
+
+    now = datetime.now(timezone.utc)
+    if sync or _cache_write_mode() == "sync":
+        _write_usage(hits, stats, now)
+    else:
+        _get_cache_writer().submit(_write_usage, hits, stats, now)
+
+
+def sweep_translation_cache(unused_days: float) -> int:
+    cutoff = datetime.now(timezone.utc) - timedelta(days=float(unused_days))
+    result = mongo.db.translations_cache.delete_many({"$or": [
+        {"last_used_at": {"$lt": cutoff}},
+        {"last_used_at": {"$exists": False}, "created_at": {"$lt": cutoff}},
+    ]})
+    return int(result.deleted_count)
+
+
+def translation_cache_stats() -> dict:
+    sizes = {
+        d["_id"]: d["entries"]
+        for d in mongo.db.translations_cache.aggregate([
+            {"$group": {"_id": "$target_language", "entries": {"$sum": 1}}},
+        ])
+    }
+    counters = {d["_id"]: d for d in mongo.db.translation_stats.find()}
+
+    languages = {}
+    for lang in sorted(set(sizes) | set(counters)):
+        c = counters.get(lang) or {}
+        hits = int(c.get("hits") or 0)
+        misses = int(c.get("misses") or 0)
+        languages[lang] = {
+            "entries": int(sizes.get(lang) or 0),
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": (hits / (hits + misses)) if (hits + misses) else 0.0,
+            "chars_saved": int(c.get("chars_saved") or 0),
+            "chars_translated": int(c.get("chars_translated") or 0),
+        }
+
+    return {
+        "total_entries": sum(sizes.values()),
+        "estimated_chars_saved": sum(l["chars_saved"] for l in languages.values()),
+        "languages": languages,
+        "process_lru": _lru.stats(),
+    }
+
+
+def flush_translation_cache_writes() -> None:
+    flush_translation_usage()
+    with _cache_writer_lock:
+        writer = _cache_writer
+    if writer is not None:
+        # the writer is single-threaded, so once a no-op sentinel runs every earlier write has finished;
+        # the executor stays up for request threads that already hold a reference to it
+        writer.submit(lambda: None).result()
+
+
+def _persist_translations(docs: List[dict], sync: bool = False) -> bool:
+    if not docs:
+        return True
+
+    collection = mongo.db.translations_cache
+    if sync or _cache_write_mode() == "sync":
+        return _write_cache_docs(collection, docs)
+
+    _get_cache_writer().submit(_write_cache_docs, collection, docs)
+    return True
 
 
 def translate_text(text: str, target_language: str, source_language: str | None = None) -> str:
     return translate_texts([text], target_language=target_language, source_language=source_language)[0]
 
 
-def translate_texts(
-    texts: Iterable[str],
-    target_language: str,
-    source_language: str | None = None,
-) -> List[str]:
-    _ensure_indexes()
+def _lookup_cached(cleaned: List[str], keys: List[str]) -> Dict[str, str]:
+    wanted = list(dict.fromkeys(k for t, k in zip(cleaned, keys) if t))
+    cache_map: Dict[str, str] = _lru.get_many(wanted)
 
-    target_language = (target_language or "en").strip().lower()
-    if target_language in ("en", "en-gb", "en-us"):
-        return [t for t in texts]
+    remote_keys = [k for k in wanted if k not in cache_map]
+    if remote_keys:
+        cached_docs = mongo.db.translations_cache.find(
+            {"key": {"$in": remote_keys}},
+            {"key": 1, "translated": 1},
+        )
+        from_mongo = {d["key"]: d.get("translated", "") for d in cached_docs}
+        _lru.put_many(from_mongo)
+        cache_map.update(from_mongo)
 
-    cleaned: List[str] = []
-    for t in texts:
-        t = (t or "").strip()
-        cleaned.append(t)
+    return cache_map
 
-    keys = [_hash_key(t, target_language, source_language) for t in cleaned]
-    cached_docs = list(mongo.db.translations_cache.find({"key": {"$in": keys}}))
-    cache_map: Dict[str, str] = {d["key"]: d.get("translated", "") for d in cached_docs}
 
+def _split_hits(cleaned: List[str], keys: List[str], cache_map: Dict[str, str]):
     results: List[Optional[str]] = [None] * len(cleaned)
     misses: List[str] = []
     miss_indexes: List[int] = []
@@ -67,41 +355,251 @@ def translate_texts(
             miss_indexes.append(idx)
             miss_keys.append(k)
 
-    if misses:
-        client = translate.TranslationServiceClient()
-        parent = f"projects/{_project_id()}/locations/{_location()}"
+    return results, misses, miss_indexes, miss_keys
+
 
-        req = {
-            "parent": parent,
-            "contents": misses,
-            "target_language_code": target_language,
+def _translate_and_store(
+    misses: List[str],
+    miss_keys: List[str],
+    target_language: str,
+    source_language: Optional[str],
+    sync_persist: bool = False,
+) -> List[str]:
+    translated_texts = _translate_via_api(misses, target_language, source_language)
+
+    now = datetime.now(timezone.utc)
+    bulk: Dict[str, dict] = {}
+    for k, src, tr in zip(miss_keys, misses, translated_texts):
+        bulk[k] = {
+            "key": k,
+            "source_language": source_language,
+            "target_language": target_language,
+            "source": src,
+            "translated": tr,
+            "created_at": now,
+            "last_used_at": now,
+            "hit_count": 0,
         }
-        if source_language:
-            req["source_language_code"] = source_language
-
-        resp = client.translate_text(request=req)
-        translated_texts = [tr.translated_text for tr in resp.translations]
-
-        now = datetime.now(timezone.utc)
-        bulk = []
-        for k, src, tr in zip(miss_keys, misses, translated_texts):
-            bulk.append({
-                "key": k,
-                "source_language": source_language,
-                "target_language": target_language,
-                "source": src,
-                "translated": tr,
-                "created_at": now,
-            })
-
-        for doc in bulk:
-            mongo.db.translations_cache.update_one(
-                {"key": doc["key"]},
-                {"$setOnInsert": doc},
-                upsert=True
-            )
-
-        for idx, tr in zip(miss_indexes, translated_texts):
-            results[idx] = tr
+
+    _persist_translations(list(bulk.values()), sync=sync_persist)
+    _lru.put_many(dict(zip(miss_keys, translated_texts)))
+    return translated_texts
+
+
+def _single_flight_wait_seconds() -> float:
+    return float(os.getenv("TRANSLATION_SINGLE_FLIGHT_WAIT_SECONDS", "2"))
+
+
+def _lease_seconds() -> float:
+    return float(os.getenv("TRANSLATION_LEASE_SECONDS", "30"))
+
+
+def _leases_enabled() -> bool:
+    return os.getenv("TRANSLATION_LEASES", "1") != "0"
+
+
+def _acquire_leases(keys: List[str]) -> tuple[List[str], List[str], str | None]:
+    if not keys or not _leases_enabled():
+        return keys, [], None
+
+    now = datetime.now(timezone.utc)
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+    ops = [
+        UpdateOne(
+            {"_id": k, "expires_at": {"$lt": now}},
+            {"$set": {"owner": owner, "expires_at": now + timedelta(seconds=_lease_seconds())}},
+            upsert=True,
+        )
+        for k in keys
+    ]
+
+    try:
+        mongo.db.translation_leases.bulk_write(ops, ordered=False)
+        return keys, [], owner
+    except BulkWriteError as e:
+        # a duplicate _id means another worker holds an unexpired lease on that key
+        held = {keys[err["index"]] for err in e.details.get("writeErrors", []) if err.get("code") == 11000}
+        return [k for k in keys if k not in held], [k for k in keys if k in held], owner
+    except Exception:
+        logger.exception("Could not acquire translation leases; translating without them")
+        return keys, [], None
+
+
+def _release_leases(keys: List[str], owner: str | None) -> None:
+    if not keys or not owner or not _leases_enabled():
+        return
+    try:
+        # only drop leases we still own; an expired one may already belong to another worker
+        mongo.db.translation_leases.delete_many({"_id": {"$in": keys}, "owner": owner})
+    except Exception:
+        logger.exception("Could not release translation leases")
+
+
+def _await_remote_translations(keys: List[str], deadline: float) -> Dict[str, str]:
+    found: Dict[str, str] = {}
+    pending = list(keys)
+    while pending and time.monotonic() < deadline:
+        time.sleep(0.1)
+        docs = mongo.db.translations_cache.find({"key": {"$in": pending}}, {"key": 1, "translated": 1})
+        batch = {d["key"]: d.get("translated", "") for d in docs if d.get("translated")}
+        if batch:
+            _lru.put_many(batch)
+            found.update(batch)
+            pending = [k for k in pending if k not in batch]
+    return found
+
+
+def _translate_single_flight(
+    misses: List[str],
+    miss_keys: List[str],
+    target_language: str,
+    source_language: Optional[str],
+    sync_persist: bool = False,
+) -> Dict[str, str]:
+    unique = dict(zip(miss_keys, misses))
+    deadline = time.monotonic() + _single_flight_wait_seconds()
+
+    leading: Dict[str, str] = {}
+    following: Dict[str, threading.Event] = {}
+    with _inflight_lock:
+        for k, t in unique.items():
+            event = _inflight.get(k)
+            if event is None:
+                _inflight[k] = threading.Event()
+                leading[k] = t
+            else:
+                following[k] = event
+
+    out: Dict[str, str] = {}
+    try:
+        leased, held_elsewhere, lease_owner = _acquire_leases(list(leading))
+        try:
+            if leased:
+                # other workers only see the cache once the lease is gone, so write before releasing it
+                translated = _translate_and_store(
+                    [leading[k] for k in leased], leased, target_language, source_language,
+                    sync_persist=sync_persist or lease_owner is not None,
+                )
+                out.update(zip(leased, translated))
+        finally:
+            _release_leases(leased, lease_owner)
+
+        if held_elsewhere:
+            out.update(_await_remote_translations(held_elsewhere, deadline))
+    finally:
+        with _inflight_lock:
+            for k in leading:
+                event = _inflight.pop(k, None)
+                if event is not None:
+                    event.set()
+
+    for event in following.values():
+        event.wait(timeout=max(0.0, deadline - time.monotonic()))
+    if following:
+        out.update(_lru.get_many(list(following)))
+
+    # whoever we waited on failed or timed out; pay for the call ourselves
+    leftover = [k for k in unique if not out.get(k)]
+    if leftover:
+        translated = _translate_and_store(
+            [unique[k] for k in leftover], leftover, target_language, source_language, sync_persist=sync_persist,
+        )
+        out.update(zip(leftover, translated))
+
+    return out
+
+
+def translate_texts(
+    texts: Iterable[str],
+    target_language: str,
+    source_language: str | None = None,
+    sync_persist: bool = False,
+) -> List[str]:
+    target_language = (target_language or "en").strip().lower()
+    if target_language in ("en", "en-gb", "en-us"):
+        return [t for t in texts]
+
+    cleaned = [(t or "").strip() for t in texts]
+    keys = [_hash_key(t, target_language, source_language) for t in cleaned]
+    cache_map = _lookup_cached(cleaned, keys)
+    results, misses, miss_indexes, miss_keys = _split_hits(cleaned, keys, cache_map)
+    _record_usage(target_language, cleaned, keys, cache_map)
+
+    if misses:
+        translated = _translate_single_flight(
+            misses, miss_keys, target_language, source_language, sync_persist=sync_persist,
+        )
+        for idx, k in zip(miss_indexes, miss_keys):
+            results[idx] = translated.get(k, "")
 
     return [r if r is not None else "" for r in results]
+
+
+def count_missing_translations(texts: Iterable[str], target_language: str, source_language: str | None = None) -> int:
+    keys = list({_hash_key((t or "").strip(), target_language, source_language) for t in texts if (t or "").strip()})
+    if not keys:
+        return 0
+    return len(keys) - mongo.db.translations_cache.count_documents({"key": {"$in": keys}})
+
+
+def _run_background_translation(
+    misses: List[str],
+    miss_keys: List[str],
+    target_language: str,
+    source_language: Optional[str],
+) -> None:
+    try:
+        _translate_single_flight(misses, miss_keys, target_language, source_language)
+    except Exception:
+        logger.exception("Background translation to %s failed", target_language)
+    finally:
+        with _background_lock:
+            _background_pending.difference_update(miss_keys)
+
+
+def schedule_translation(
+    misses: List[str],
+    miss_keys: List[str],
+    target_language: str,
+    source_language: Optional[str] = None,
+) -> int:
+    global _background_translator
+    with _background_lock:
+        todo = {k: t for k, t in zip(miss_keys, misses) if k not in _background_pending}
+        _background_pending.update(todo)
+        if _background_translator is None:
+            _background_translator = ThreadPoolExecutor(max_workers=1, thread_name_prefix="translate-background")
+        translator = _background_translator
+
+    if todo:
+        translator.submit(
+            _run_background_translation,
+            list(todo.values()),
+            list(todo.keys()),
+            target_language,
+            source_language,
+        )
+    return len(todo)
+
+
+def translate_texts_nonblocking(
+    texts: Iterable[str],
+    target_language: str,
+    source_language: str | None = None,
+) -> tuple[List[str], bool]:
+    target_language = (target_language or "en").strip().lower()
+    if target_language in ("en", "en-gb", "en-us"):
+        return [t for t in texts], False
+
+    cleaned = [(t or "").strip() for t in texts]
+    keys = [_hash_key(t, target_language, source_language) for t in cleaned]
+    cache_map = _lookup_cached(cleaned, keys)
+    results, misses, miss_indexes, miss_keys = _split_hits(cleaned, keys, cache_map)
+    _record_usage(target_language, cleaned, keys, cache_map)
+
+    if misses:
+        schedule_translation(misses, miss_keys, target_language, source_language)
+        for idx in miss_indexes:
+            results[idx] = cleaned[idx]
+
+    return [r if r is not None else "" for r in results], bool(misses)
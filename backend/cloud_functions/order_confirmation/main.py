@@ -4,19 +4,12 @@ from google.cloud import datastore
 
 client = datastore.Client()
 
-def order_confirmation(request: Request):
-    if request.method == "GET":
-        return jsonify({"ok": True, "version": "datastore-v1"}), 200
+PUT_MULTI_LIMIT = 500
+MAX_BATCH_SIZE = 2000
 
-    if request.method != "POST":
-        return jsonify({"error": "method_not_allowed"}), 405
 
-    data = request.get_json(silent=True) or {}
+def _build_entity(data: dict, received_at: str) -> datastore.Entity:
     order_id = data.get("order_id")
-
-    if not order_id:
-        return jsonify({"error": "missing_order_id"}), 400
-
     entity = datastore.Entity(key=client.key("order_confirmations", str(order_id)))
     entity.update({
         "order_id": str(order_id),
@@ -24,9 +17,74 @@ def order_confirmation(request: Request):
         "total_amount": data.get("total_amount"),
         "currency": data.get("currency", "GBP"),
         "items": data.get("items", []),
-        "received_at": datetime.now(timezone.utc).isoformat(),
+        "received_at": received_at,
         "source": "restaurant-app",
     })
+    return entity
+
+
+def _handle_batch(confirmations: list):
+    if len(confirmations) > MAX_BATCH_SIZE:
+        return jsonify({"error": "batch_too_large", "max": MAX_BATCH_SIZE}), 413
+
+    received_at = datetime.now(timezone.utc).isoformat()
+    results: list[dict] = [{} for _ in confirmations]
+
+    # put_multi rejects two mutations of the same key, and the outbox can hold the same
+    # order twice, so write one entity per order (last payload wins) and fan the result out
+    by_order: dict[str, tuple[list[int], dict]] = {}
+    for idx, data in enumerate(confirmations):
+        order_id = data.get("order_id") if isinstance(data, dict) else None
+        if not order_id:
+            results[idx] = {"index": idx, "ok": False, "error": "missing_order_id"}
+            continue
+        results[idx] = {"index": idx, "order_id": str(order_id), "ok": True}
+        indexes, _ = by_order.get(str(order_id), ([], None))
+        by_order[str(order_id)] = (indexes + [idx], data)
+
+    pending = [(indexes, _build_entity(data, received_at)) for indexes, data in by_order.values()]
+
+    for start in range(0, len(pending), PUT_MULTI_LIMIT):
+        chunk = pending[start:start + PUT_MULTI_LIMIT]
+        try:
+            client.put_multi([entity for _, entity in chunk])
+        except Exception as e:
+            for indexes, _ in chunk:
+                for idx in indexes:
+                    results[idx].update({"ok": False, "error": "datastore_write_failed", "details": repr(e)})
+
+    failed = sum(1 for r in results if not r.get("ok"))
+    if failed == 0:
+        code = 200
+    elif failed == len(results):
+        code = 500
+    else:
+        code = 207
+
+    return jsonify({"ok": failed == 0, "failed": failed, "results": results}), code
+
+
+def order_confirmation(request: Request):
+    if request.method == "GET":
+        return jsonify({"ok": True, "version": "datastore-v2", "batch": True}), 200
+
+    if request.method != "POST":
+        return jsonify({"error": "method_not_allowed"}), 405
+
+    data = request.get_json(silent=True)
+
+    if isinstance(data, list):
+        return _handle_batch(data)
+    if isinstance(data, dict) and isinstance(data.get("confirmations"), list):
+        return _handle_batch(data["confirmations"])
+
+    data = data if isinstance(data, dict) else {}
+    order_id = data.get("order_id")
+
+    if not order_id:
+        return jsonify({"error": "missing_order_id"}), 400
+
+    entity = _build_entity(data, datetime.now(timezone.utc).isoformat())
 
     try:
         client.put(entity)
@@ -15,6 +15,8 @@ CREATE TABLE IF NOT EXISTS orders (
     total NUMERIC(10,2) DEFAULT 0
 );
 
+CREATE INDEX IF NOT EXISTS ix_orders_created_at_id ON orders (created_at, id);
+
 CREATE TABLE IF NOT EXISTS order_items (
     id SERIAL PRIMARY KEY,
     order_id INTEGER REFERENCES orders(id) ON DELETE CASCADE,
@@ -24,3 +26,20 @@ CREATE TABLE IF NOT EXISTS order_items (
     quantity INTEGER DEFAULT 1,
     price NUMERIC(10,2) DEFAULT 0
 );
+
+CREATE TABLE IF NOT EXISTS outbox_messages (
+    id SERIAL PRIMARY KEY,
+    topic VARCHAR(64) NOT NULL,
+    order_id INTEGER REFERENCES orders(id) ON DELETE CASCADE,
+    payload JSON NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    sent_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS ix_outbox_messages_topic ON outbox_messages (topic);
+CREATE INDEX IF NOT EXISTS ix_outbox_messages_order_id ON outbox_messages (order_id);
+CREATE INDEX IF NOT EXISTS ix_outbox_messages_next_attempt_at ON outbox_messages (next_attempt_at);
@@ -42,3 +42,81 @@ def app():
 @pytest.fixture()
 def client(app):
     return app.test_client()
+
+
+@pytest.fixture()
+def admin_user(app):
+    from werkzeug.security import generate_password_hash
+    from app.extensions import db
+    from app.models.user_model import User
+
+    with app.app_context():
+        admin = User(
+            email="admin@example.com",
+            password_hash=generate_password_hash("Password123!"),
+            first_name="Ada",
+            last_name="Admin",
+            is_admin=True,
+        )
+        db.session.add(admin)
+        db.session.commit()
+        return admin.id
+
+
+@pytest.fixture()
+def admin_client(client, admin_user):
+    res = client.post("/login", data={"email": "admin@example.com", "password": "Password123!"})
+    assert res.status_code in (302, 303)
+    return client
+
+
+class FakeCollection:
+    """Just enough of a pymongo collection for services that use equality filters and $set."""
+
+    def __init__(self):
+        self.docs = []
+
+    def _matches(self, doc, query):
+        return all(doc.get(k) == v for k, v in query.items())
+
+    def find_one(self, query):
+        for doc in self.docs:
+            if self._matches(doc, query):
+                return dict(doc)
+        return None
+
+    def find_one_and_update(self, query, update, return_document=None, **kwargs):
+        from pymongo import ReturnDocument
+
+        for doc in self.docs:
+            if self._matches(doc, query):
+                before = dict(doc)
+                doc.update(update.get("$set", {}))
+                return before if return_document == ReturnDocument.BEFORE else dict(doc)
+        return None
+
+    def update_one(self, query, update, **kwargs):
+        for doc in self.docs:
+            if self._matches(doc, query):
+                doc.update(update.get("$set", {}))
+                return
+
+    def delete_one(self, query):
+        self.docs = [doc for doc in self.docs if not self._matches(doc, query)]
+
+    def insert_one(self, doc):
+        from types import SimpleNamespace
+
+        doc.setdefault("_id", f"doc{len(self.docs) + 1}")
+        self.docs.append(dict(doc))
+        return SimpleNamespace(inserted_id=doc["_id"])
+
+
+@pytest.fixture()
+def uploaded_images(app, monkeypatch):
+    from types import SimpleNamespace
+    from app.services import image_service
+
+    images = FakeCollection()
+    monkeypatch.setattr(image_service, "mongo", SimpleNamespace(db=SimpleNamespace(uploaded_images=images)))
+    return images
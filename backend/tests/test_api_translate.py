@@ -0,0 +1,38 @@
+import pytest
+
+
+@pytest.fixture()
+def local_backend(app, monkeypatch):
+    from app.services import translate_service
+    from app.services.translate_backends import LocalTranslateBackend, set_translate_backend
+
+    backend = LocalTranslateBackend()
+    set_translate_backend(backend)
+    monkeypatch.setenv("TRANSLATION_LEASES", "0")
+    monkeypatch.setenv("TRANSLATION_USAGE_FLUSH_SECONDS", "3600")
+    monkeypatch.setattr(translate_service, "_lookup_cached", lambda cleaned, keys: {})
+    monkeypatch.setattr(translate_service, "_persist_translations", lambda docs, sync=False: True)
+    translate_service._lru.clear()
+    yield backend
+    set_translate_backend(None)
+    translate_service._lru.clear()
+    translate_service._usage_hits.clear()
+    translate_service._usage_stats.clear()
+
+
+def test_batch_translate_uses_one_upstream_call(client, local_backend):
+    res = client.post("/api/translate", json={"texts": ["Add to cart", "Checkout", ""], "target_language": "fr"})
+
+    assert res.status_code == 200
+    assert res.get_json()["translated"] == ["[fr] Add to cart", "[fr] Checkout", ""]
+    assert local_backend.calls == 1
+
+
+def test_batch_translate_enforces_limits(client, local_backend, monkeypatch):
+    monkeypatch.setenv("TRANSLATE_BATCH_MAX_ITEMS", "2")
+    res = client.post("/api/translate", json={"texts": ["a", "b", "c"], "target_language": "fr"})
+    assert res.status_code == 413
+    assert res.get_json()["error"] == "too_many_texts"
+
+    assert client.post("/api/translate", json={"texts": "nope"}).status_code == 400
+    assert local_backend.calls == 0
@@ -0,0 +1,135 @@
+from types import SimpleNamespace
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+
+class _RecordingCarts:
+    def __init__(self, push_conflicts: int = 0):
+        self.calls = []
+        self.push_conflicts = push_conflicts
+
+    def find_one_and_update(self, query, update, upsert=False, **kwargs):
+        self.calls.append(("$push" if "$push" in update else "$inc", upsert))
+        if "$push" in update:
+            if self.push_conflicts:
+                self.push_conflicts -= 1
+                raise DuplicateKeyError("E11000 duplicate key error")
+            return {"_id": "cart", "items": [update["$push"]["items"]]}
+        if len(self.calls) > 1:
+            return {"_id": "cart", "items": []}
+        return None
+
+
+@pytest.fixture()
+def order_service(app, monkeypatch):
+    from app.services import order_service
+
+    monkeypatch.setattr(order_service, "_find_menu_item_and_variant", lambda m, v: {
+        "name": "Soup", "category": "Starters", "variant_label": "Bowl", "unit_price": 4.5,
+    })
+    return order_service
+
+
+def _add(app, order_service, monkeypatch, carts):
+    monkeypatch.setattr(order_service, "mongo", SimpleNamespace(db=SimpleNamespace(carts=carts)))
+    with app.test_request_context():
+        return order_service.add_to_cart("m1", "v1", 2)
+
+
+def test_add_new_line_is_an_increment_then_one_upserting_push(app, order_service, monkeypatch):
+    carts = _RecordingCarts()
+
+    assert _add(app, order_service, monkeypatch, carts)["ok"] is True
+    assert carts.calls == [("$inc", False), ("$push", True)]
+
+
+def test_add_retries_the_increment_when_a_concurrent_add_wins(app, order_service, monkeypatch):
+    # the unique carts.user_id index turns a racing second cart into a DuplicateKeyError
+    carts = _RecordingCarts(push_conflicts=1)
+
+    assert _add(app, order_service, monkeypatch, carts)["ok"] is True
+    assert carts.calls == [("$inc", False), ("$push", True), ("$inc", False)]
+
+
+class _StoredCart:
+    def __init__(self, cart):
+        self.cart = cart
+        self.writes = []
+
+    def find_one(self, query):
+        return dict(self.cart) if self.cart else None
+
+    def update_one(self, query, update, **kwargs):
+        self.writes.append(update)
+
+
+def test_checkout_inserts_one_row_batch_per_table(app, admin_user, order_service, monkeypatch):
+    from decimal import Decimal
+    from flask_login import login_user
+    from sqlalchemy import event
+    from app.extensions import db
+    from app.models.outbox_model import OutboxMessage
+    from app.models.sql_order_model import Order, OrderItem
+    from app.models.user_model import User
+
+    carts = _StoredCart({"_id": "cart", "items": [
+        {"_id": "l1", "menu_item_id": "m1", "variant_id": "v1", "name": "Soup", "qty": 2, "unit_price": 1.0},
+        {"_id": "l2", "menu_item_id": "m2", "variant_id": "v2", "name": "Tea", "qty": 3, "unit_price": 1.0},
+    ]})
+    monkeypatch.setattr(order_service, "mongo", SimpleNamespace(db=SimpleNamespace(carts=carts)))
+    monkeypatch.setattr(order_service, "get_menu_variant_index", lambda: {
+        ("m1", "v1"): {"name": "Soup", "category": "Starters", "variant_label": "Bowl", "unit_price": 4.5},
+        ("m2", "v2"): {"name": "Tea", "category": "Drinks", "variant_label": "Pot", "unit_price": 2.35},
+    })
+    monkeypatch.setattr(order_service, "wake_dispatcher", lambda: None)
+    monkeypatch.setenv("ORDER_CONFIRMATION_URL", "https://example.invalid/confirm")
+
+    inserts = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("INSERT"):
+            inserts.append(statement.split()[2].strip('"'))
+
+    with app.test_request_context():
+        login_user(db.session.get(User, admin_user))
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            order_id = order_service.checkout_to_sql_order()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+
+        assert sorted(inserts) == ["order_items", "orders", "outbox_messages"]
+
+        order = db.session.get(Order, order_id)
+        assert order.total_amount == Decimal("16.05")
+        items = db.session.query(OrderItem).filter_by(order_id=order_id).order_by(OrderItem.name).all()
+        assert [(i.name, i.qty, i.unit_price, i.line_total) for i in items] == [
+            ("Soup", 2, Decimal("4.50"), Decimal("9.00")),
+            ("Tea", 3, Decimal("2.35"), Decimal("7.05")),
+        ]
+        message = db.session.query(OutboxMessage).one()
+        assert message.payload["total_amount"] == 16.05
+        assert carts.writes[-1]["$set"]["items"] == []
+
+
+def test_get_cart_without_a_document_does_not_write(app, order_service, monkeypatch):
+    # _StoredCart only records update_one; any other write would fail with AttributeError
+    carts = _StoredCart(None)
+    monkeypatch.setattr(order_service, "mongo", SimpleNamespace(db=SimpleNamespace(carts=carts)))
+
+    with app.test_request_context():
+        cart = order_service.get_cart()
+
+    assert cart["items"] == []
+    assert carts.writes == []
+
+
+def test_api_add_unknown_item_is_404(admin_client, order_service, monkeypatch):
+    monkeypatch.setattr(order_service, "_find_menu_item_and_variant", lambda m, v: None)
+    monkeypatch.setattr(order_service, "mongo", SimpleNamespace(db=SimpleNamespace(carts=_RecordingCarts())))
+
+    res = admin_client.post("/api/cart/items", json={"menu_item_id": "m1", "variant_id": "gone"})
+
+    assert res.status_code == 404
+    assert res.get_json() == {"error": "item_not_found"}
@@ -0,0 +1,136 @@
+import io
+
+import pytest
+
+
+def _png_bytes(color=(20, 120, 200)) -> bytes:
+    from PIL import Image
+
+    buf = io.BytesIO()
+    Image.new("RGB", (40, 30), color).save(buf, "PNG")
+    return buf.getvalue()
+
+
+@pytest.fixture()
+def local_storage(uploaded_images, tmp_path, monkeypatch):
+    from app.services import image_service
+    from app.services.storage_backends import LocalStorageBackend, set_storage_backend
+
+    rendered = []
+    # run the post-confirm work inline, but keep PIL out of it
+    monkeypatch.setenv("IMAGE_DERIVATIVES_MODE", "sync")
+    monkeypatch.setattr(image_service, "_store_derivatives", lambda image_id, name, data: rendered.append(name))
+
+    backend = LocalStorageBackend(str(tmp_path))
+    set_storage_backend(backend)
+    backend.rendered = rendered
+    yield backend
+    set_storage_backend(None)
+
+
+def _sign(client, **overrides):
+    body = {"filename": "dish.png", "content_type": "image/png", "size": 100}
+    body.update(overrides)
+    return client.post("/api/admin/uploads/sign", json=body)
+
+
+def _upload(client, signed, data):
+    res = client.put(signed["upload"]["url"], data=data, headers=signed["upload"]["headers"])
+    assert res.status_code == 200
+
+
+def _confirm(client, signed):
+    return client.post("/api/admin/uploads/confirm", json={"upload_token": signed["upload_token"]})
+
+
+def test_signed_upload_goes_to_storage_then_confirm_registers_image(admin_client, local_storage, uploaded_images):
+    data = _png_bytes()
+    signed = _sign(admin_client).get_json()
+    assert signed["ok"] is True and signed["upload"]["method"] == "PUT"
+
+    # before the client uploads, confirm refuses to register anything
+    assert _confirm(admin_client, signed).status_code == 409
+    assert uploaded_images.docs == []
+
+    _upload(admin_client, signed, data)
+    res = _confirm(admin_client, signed)
+    assert res.status_code == 201
+    image = res.get_json()["image"]
+    assert image["object_name"] == signed["object_name"]
+
+    doc = uploaded_images.docs[0]
+    assert doc["size_bytes"] == len(data)
+    assert len(doc["md5"]) == 32 and len(doc["sha256"]) == 64
+    assert local_storage.rendered == [signed["object_name"]]
+
+    served = admin_client.get(image["url"])
+    assert served.data == data
+    assert served.mimetype == "image/png"
+
+    # a second direct upload with the same hash is answered from the library
+    again = _sign(admin_client, sha256=doc["sha256"]).get_json()
+    assert again["deduplicated"] is True
+    assert again["image"]["id"] == image["id"]
+
+
+def test_confirm_dedupes_on_stored_checksum_without_downloading(admin_client, local_storage, uploaded_images, monkeypatch):
+    data = _png_bytes()
+    first = _sign(admin_client).get_json()
+    _upload(admin_client, first, data)
+    first_image = _confirm(admin_client, first).get_json()["image"]
+
+    second = _sign(admin_client).get_json()
+    _upload(admin_client, second, data)
+    monkeypatch.setattr(local_storage, "read", lambda name: pytest.fail("confirm should not download the object"))
+
+    res = _confirm(admin_client, second)
+    assert res.status_code == 201
+    assert res.get_json()["image"]["id"] == first_image["id"]
+    assert len(uploaded_images.docs) == 1
+    assert local_storage.stat(second["object_name"]) is None
+
+
+def test_finish_reuses_existing_image_when_only_sha256_matches(admin_client, local_storage, uploaded_images, monkeypatch):
+    from pymongo.errors import DuplicateKeyError
+
+    data = _png_bytes()
+    first = _sign(admin_client).get_json()
+    _upload(admin_client, first, data)
+    first_image = _confirm(admin_client, first).get_json()["image"]
+
+    # the bucket has no md5 for this one, so only the sha256 index catches the duplicate
+    stat = local_storage.stat
+    monkeypatch.setattr(local_storage, "stat", lambda name: stat(name) and {**stat(name), "md5": None})
+    set_sha256 = uploaded_images.update_one
+
+    def unique_sha256(query, update, **kwargs):
+        sha256 = update.get("$set", {}).get("sha256")
+        if sha256 and any(d.get("sha256") == sha256 and d["_id"] != query["_id"] for d in uploaded_images.docs):
+            raise DuplicateKeyError("sha256")
+        return set_sha256(query, update, **kwargs)
+
+    monkeypatch.setattr(uploaded_images, "update_one", unique_sha256)
+
+    second = _sign(admin_client).get_json()
+    _upload(admin_client, second, data)
+    res = _confirm(admin_client, second)
+
+    assert res.status_code == 201
+    assert res.get_json()["image"]["id"] == first_image["id"]
+    assert [d["object_name"] for d in uploaded_images.docs] == [first["object_name"]]
+    assert stat(second["object_name"]) is None
+    assert local_storage.rendered == [first["object_name"]]
+
+
+def test_sign_rejects_unsupported_or_oversized_files(admin_client, local_storage, monkeypatch):
+    monkeypatch.setenv("IMAGE_UPLOAD_MAX_BYTES", "10")
+
+    assert _sign(admin_client, content_type="application/pdf").get_json()["error"] == "unsupported_content_type"
+    assert _sign(admin_client, size=11).get_json()["error"] == "file_too_large"
+    assert _confirm(admin_client, {"upload_token": "nope"}).status_code == 400
+    assert admin_client.put("/api/storage/local/upload/forged", data=b"x").status_code == 403
+
+
+def test_local_storage_route_rejects_path_traversal(client, local_storage):
+    assert client.get("/api/storage/local/..%2F..%2Fetc%2Fpasswd").status_code == 404
+    assert client.get("/api/storage/local/menu/../../secret.txt").status_code == 404
@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+
+@pytest.fixture()
+def registry(app):
+    from app.services import gcp_clients
+
+    gcp_clients.reset_clients()
+    yield gcp_clients
+    gcp_clients.reset_clients()
+
+
+def test_clients_are_built_once_per_process(registry, monkeypatch):
+    built = []
+    monkeypatch.setitem(registry._factories, "storage", lambda: built.append(object()) or built[-1])
+
+    first = registry.get_client("storage")
+    second = registry.get_client("storage")
+
+    assert first is second
+    assert len(built) == 1
+    stats = registry.client_stats()
+    assert stats["pid"] == os.getpid()
+    assert stats["clients"]["storage"]["created"] == 1
+    assert stats["clients"]["storage"]["active"] is True
+
+
+def test_registry_rebuilds_clients_after_fork(registry, monkeypatch):
+    built = []
+    monkeypatch.setitem(registry._factories, "datastore", lambda: built.append(object()) or built[-1])
+
+    parent_client = registry.get_client("datastore")
+    # simulate running in a worker forked from a preloaded master
+    monkeypatch.setattr(registry, "_pid", os.getpid() + 1)
+
+    child_client = registry.get_client("datastore")
+    assert child_client is not parent_client
+    assert registry.client_stats()["clients"]["datastore"]["created"] == 1
+    assert len(built) == 2
+
+
+def test_unknown_client_name_is_rejected(registry):
+    with pytest.raises(KeyError):
+        registry.get_client("bigquery")
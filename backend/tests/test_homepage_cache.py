@@ -0,0 +1,22 @@
+def test_homepage_slots_cached_until_invalidated(app, client, monkeypatch):
+    from app.services import homepage_service
+
+    loads = []
+
+    def fake_load():
+        loads.append(1)
+        return [{"_id": "img1", "url": "https://example.invalid/a.jpg", "object_name": "menu/a.jpg"}, None, None, None]
+
+    monkeypatch.setattr(homepage_service, "_load_homepage_slots", fake_load)
+    homepage_service.invalidate_homepage_slots()
+
+    first = client.get("/api/images/homepage").get_json()
+    client.get("/")
+    assert first["slots"][0]["url"] == "https://example.invalid/a.jpg"
+    assert len(loads) == 1
+
+    homepage_service.invalidate_homepage_slots()
+    client.get("/api/images/homepage")
+    assert len(loads) == 2
+
+    homepage_service.invalidate_homepage_slots()
@@ -0,0 +1,96 @@
+import io
+
+
+def _jpeg_bytes(width: int, height: int) -> bytes:
+    from PIL import Image
+
+    buf = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 80, 40)).save(buf, "JPEG")
+    return buf.getvalue()
+
+
+def test_render_derivatives_resizes_and_skips_upscaling(app):
+    from app.services.image_service import render_derivatives
+
+    rendered = render_derivatives(_jpeg_bytes(1000, 500))
+    sizes = {(r["name"], r["format"]): (r["width"], r["height"]) for r in rendered}
+
+    assert sizes[("thumb", "webp")] == (320, 160)
+    assert sizes[("card", "jpg")] == (800, 400)
+    # the hero size would upscale, so the original width is used once
+    assert sizes[("hero", "webp")] == (1000, 500)
+    assert all(r["data"] for r in rendered)
+
+
+def test_srcset_variants_groups_by_format(app):
+    from app.services.image_service import srcset_variants
+
+    doc = {"variants": [
+        {"name": "card", "format": "webp", "width": 800, "url": "https://cdn/card.webp"},
+        {"name": "thumb", "format": "webp", "width": 320, "url": "https://cdn/thumb.webp"},
+        {"name": "thumb", "format": "jpg", "width": 320, "url": "https://cdn/thumb.jpg"},
+    ]}
+
+    out = srcset_variants(doc)
+    assert out["srcset"] == {
+        "webp": "https://cdn/thumb.webp 320w, https://cdn/card.webp 800w",
+        "jpg": "https://cdn/thumb.jpg 320w",
+    }
+    assert len(out["variants"]) == 3
+
+
+def test_identical_uploads_reuse_the_stored_image(uploaded_images, monkeypatch):
+    from types import SimpleNamespace
+    from app.services import image_service
+
+    uploads = []
+    invalidated = []
+    monkeypatch.setattr(image_service, "invalidate_homepage_slots", lambda: invalidated.append(True))
+    monkeypatch.setenv("IMAGE_DERIVATIVES_MODE", "off")
+    monkeypatch.setattr(
+        image_service,
+        "upload_menu_image_bytes",
+        lambda data, filename, content_type, folder="menu": uploads.append(data) or {
+            "url": f"https://cdn/{len(uploads)}.jpg", "object_name": f"menu/{len(uploads)}.jpg",
+        },
+    )
+
+    data = _jpeg_bytes(64, 64)
+
+    def _file():
+        return SimpleNamespace(stream=io.BytesIO(data), filename="dish.jpg", mimetype="image/jpeg")
+
+    first = image_service.create_uploaded_image(_file())
+    uploaded_images.docs[0]["active"] = False
+    second = image_service.create_uploaded_image(_file())
+
+    assert len(uploads) == 1
+    assert not first.get("deduplicated")
+    assert second["deduplicated"] is True
+    assert second["_id"] == first["_id"]
+    assert second["active"] is True
+    assert invalidated == [True]
+    assert first["sha256"] == second["sha256"] and len(first["sha256"]) == 64
+
+
+def test_storing_derivatives_invalidates_homepage_slots(uploaded_images, monkeypatch):
+    from concurrent.futures import Future
+    from app.services import image_service
+
+    class _InlinePool:
+        def submit(self, fn, *args):
+            f = Future()
+            f.set_result(fn(*args))
+            return f
+
+    invalidated = []
+    uploaded_images.insert_one({"_id": "img1", "variants": [], "variants_status": "pending"})
+    monkeypatch.setattr(image_service, "_get_render_pool", lambda: _InlinePool())
+    monkeypatch.setattr(image_service, "upload_bytes", lambda name, data, ct: f"https://cdn/{name}")
+    monkeypatch.setattr(image_service, "invalidate_homepage_slots", lambda: invalidated.append(True))
+
+    variants = image_service._store_derivatives("img1", "menu/abc.jpg", _jpeg_bytes(400, 200))
+
+    assert variants == uploaded_images.docs[0]["variants"]
+    assert uploaded_images.docs[0]["variants_status"] == "ready"
+    assert invalidated == [True]
@@ -0,0 +1,132 @@
+import pytest
+
+
+@pytest.fixture()
+def menu_service(app):
+    from app.services import menu_service
+    return menu_service
+
+
+@pytest.fixture()
+def fake_menu(monkeypatch, menu_service):
+    state = {"version": 1, "builds": 0}
+
+    def fake_version():
+        return state["version"]
+
+    def fake_build(group_by_category=True, target_language=None, nonblocking=False):
+        state["builds"] += 1
+        return {"lang": target_language, "grouped": group_by_category, "build": state["builds"]}, False
+
+    monkeypatch.setattr(menu_service, "get_menu_version", fake_version)
+    monkeypatch.setattr(menu_service, "_build_menu_boxes", fake_build)
+    monkeypatch.setitem(menu_service._menu_version_state, "version", 1)
+    menu_service._menu_cache.clear()
+    yield state
+    menu_service._menu_cache.clear()
+
+
+def test_menu_boxes_cached_per_language(fake_menu, menu_service):
+    first = menu_service.get_menu_boxes(target_language="it")
+    again = menu_service.get_menu_boxes(target_language="IT ")
+    english = menu_service.get_menu_boxes(target_language="en-gb")
+
+    assert first is again
+    assert english["lang"] == "en"
+    assert fake_menu["builds"] == 2
+
+
+def test_menu_boxes_rebuilt_on_version_change(fake_menu, menu_service):
+    menu_service.get_menu_boxes(target_language="fr")
+
+    fake_menu["version"] = 2
+    menu_service._menu_version_state["version"] = 2
+    menu_service.get_menu_boxes(target_language="fr")
+
+    assert fake_menu["builds"] == 2
+
+
+def test_variant_index_resolves_by_item_and_variant(monkeypatch, menu_service):
+    boxes = [{
+        "id": "pizza-1",
+        "title": "Margherita",
+        "category": "Pizza",
+        "variants": [{"id": "v12", "label": "12 inch", "price": 11.5, "available": True}],
+    }]
+    monkeypatch.setattr(menu_service, "get_menu_version", lambda: 7)
+    monkeypatch.setattr(menu_service, "get_menu_boxes", lambda group_by_category=True: boxes)
+    monkeypatch.setitem(menu_service._menu_version_state, "version", 7)
+    menu_service._menu_cache.clear()
+
+    found = menu_service.lookup_menu_variant("pizza-1", "v12")
+    assert found["unit_price"] == 11.5
+    assert found["variant_label"] == "12 inch"
+    assert menu_service.lookup_menu_variant("pizza-1", "missing") is None
+
+    menu_service._menu_cache.clear()
+
+
+class _WarmupMeta:
+    def __init__(self):
+        self.languages = {}
+
+    def find_one(self, query):
+        return {"_id": "translation_warmup", "languages": dict(self.languages)}
+
+    def update_one(self, query, update, upsert=False):
+        for path, value in update["$set"].items():
+            self.languages[path.split(".", 1)[1]] = value
+
+
+@pytest.fixture()
+def warmup(monkeypatch, menu_service):
+    from types import SimpleNamespace
+
+    state = {"calls": [], "missing": 0, "meta": _WarmupMeta()}
+    boxes = [{"title": "Margherita", "description": "Tomato", "variants": [{"label": "Small"}]}]
+
+    def fake_translate(texts, target_language, sync_persist=False):
+        assert sync_persist is True
+        state["calls"].append(target_language)
+        return list(texts)
+
+    monkeypatch.setattr(menu_service, "_build_menu_boxes", lambda group_by_category=True: (boxes, False))
+    monkeypatch.setattr(menu_service, "translate_texts", fake_translate)
+    monkeypatch.setattr(menu_service, "flush_translation_cache_writes", lambda: None)
+    monkeypatch.setattr(menu_service, "count_missing_translations", lambda texts, lang: state["missing"])
+    monkeypatch.setattr(menu_service, "mongo", SimpleNamespace(db=SimpleNamespace(menu_meta=state["meta"])))
+    return state
+
+
+def test_warmup_skips_english_and_unchanged_languages(warmup, menu_service):
+    first = menu_service.warm_menu_translations(["en", "it", "FR"])
+    assert "en" not in first
+    assert first["it"] == {"status": "warmed", "strings": 3}
+    assert warmup["calls"] == ["it", "fr"]
+
+    again = menu_service.warm_menu_translations(["it", "fr"])
+    assert again["it"]["status"] == "unchanged"
+    assert warmup["calls"] == ["it", "fr"]
+
+    forced = menu_service.warm_menu_translations(["it"], force=True)
+    assert forced["it"]["status"] == "warmed"
+    assert warmup["calls"] == ["it", "fr", "it"]
+
+
+def test_warmup_does_not_record_languages_with_missing_cache_entries(warmup, menu_service):
+    warmup["missing"] = 2
+    report = menu_service.warm_menu_translations(["de"])
+    assert report["de"] == {"status": "incomplete", "strings": 3, "missing": 2}
+    assert warmup["meta"].languages == {}
+
+    warmup["missing"] = 0
+    assert menu_service.warm_menu_translations(["de"])["de"]["status"] == "warmed"
+    assert warmup["calls"] == ["de", "de"]
+
+
+def test_unsupported_languages_share_the_english_entry(fake_menu, menu_service):
+    english = menu_service.get_menu_boxes(target_language="en")
+    assert menu_service.get_menu_boxes(target_language="xx") is english
+    assert menu_service.get_menu_boxes(target_language="zz-top") is english
+    assert fake_menu["builds"] == 1
+    assert len(menu_service._menu_cache) == 1
@@ -0,0 +1,55 @@
+import importlib
+import sys
+from pathlib import Path
+
+import pytest
+
+FUNCTION_DIR = Path(__file__).resolve().parents[1] / "cloud_functions" / "order_confirmation"
+
+
+class _FakeDatastore:
+    def __init__(self):
+        self.puts = []
+
+    def key(self, kind, name):
+        from google.cloud import datastore
+        return datastore.Key(kind, name, project="test")
+
+    def put_multi(self, entities):
+        keys = [e.key.name for e in entities]
+        if len(keys) != len(set(keys)):
+            raise ValueError("A single commit may not mutate an entity more than once")
+        self.puts.append(keys)
+
+
+@pytest.fixture()
+def function_module(monkeypatch):
+    from google.cloud import datastore
+
+    fake = _FakeDatastore()
+    monkeypatch.setattr(datastore, "Client", lambda *a, **k: fake)
+    monkeypatch.syspath_prepend(str(FUNCTION_DIR))
+    sys.modules.pop("main", None)
+    module = importlib.import_module("main")
+    yield module, fake
+    sys.modules.pop("main", None)
+
+
+def test_batch_with_duplicate_order_ids_writes_each_order_once(function_module):
+    from flask import Flask
+
+    module, fake = function_module
+    batch = [
+        {"order_id": 7, "total_amount": 10},
+        {"order_id": 8, "total_amount": 12},
+        {"order_id": 7, "total_amount": 10},
+    ]
+
+    with Flask(__name__).app_context():
+        resp, code = module._handle_batch(batch)
+
+    body = resp.get_json()
+    assert code == 200
+    assert fake.puts == [["7", "8"]]
+    assert [r["ok"] for r in body["results"]] == [True, True, True]
+    assert [r["order_id"] for r in body["results"]] == ["7", "8", "7"]
@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+def _seed_orders(app, user_id: int, count: int):
+    from app.extensions import db
+    from app.models.sql_order_model import Order, OrderItem
+
+    with app.app_context():
+        base = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+        for i in range(count):
+            db.session.add(Order(
+                user_id=user_id,
+                status="paid" if i % 2 else "created",
+                total_amount=Decimal("10.00"),
+                # pairs share a timestamp so the id tiebreaker is exercised
+                created_at=base + timedelta(minutes=i // 2),
+                order_items=[OrderItem(
+                    menu_item_id="m", variant_id="v", name="Pizza", variant_label="12 inch",
+                    unit_price=Decimal("10.00"), qty=1, line_total=Decimal("10.00"),
+                )],
+            ))
+        db.session.commit()
+
+
+def test_admin_orders_keyset_pages_cover_every_order_once(app, admin_user, admin_client):
+    _seed_orders(app, admin_user, 7)
+
+    seen = []
+    cursor = None
+    while True:
+        res = admin_client.get("/api/admin/orders", query_string={"limit": 3, "cursor": cursor or ""})
+        assert res.status_code == 200
+        data = res.get_json()
+        seen.extend(o["order_id"] for o in data["orders"])
+        cursor = data["next_cursor"]
+        if not cursor:
+            break
+
+    assert seen == list(range(7, 0, -1))
+
+
+def test_admin_orders_filter_by_status_and_reject_bad_cursor(app, admin_user, admin_client):
+    _seed_orders(app, admin_user, 6)
+
+    data = admin_client.get("/api/admin/orders", query_string={"status": "paid"}).get_json()
+    assert {o["status"] for o in data["orders"]} == {"paid"}
+    assert len(data["orders"]) == 3
+
+    assert admin_client.get("/api/admin/orders", query_string={"cursor": "not-a-cursor"}).status_code == 400
+    page = admin_client.get("/admin/orders", query_string={"limit": 2})
+    assert page.status_code == 200
+    assert b'value="completed"' in page.data
+    assert b'value="delivered"' not in page.data
+
+    assert admin_client.get("/api/admin/orders", query_string={"status": "delivered"}).status_code == 400
+    assert admin_client.patch("/api/admin/orders/1/status", json={"status": "delivered"}).status_code == 400
+    assert admin_client.patch("/api/admin/orders/1/status", json={"status": "completed"}).status_code == 200
+    completed = admin_client.get("/api/admin/orders", query_string={"status": "completed"}).get_json()
+    assert [o["order_id"] for o in completed["orders"]] == [1]
+
+
+def test_order_history_pages_with_item_counts(app, admin_user, admin_client):
+    _seed_orders(app, admin_user, 5)
+
+    first = admin_client.get("/api/orders", query_string={"limit": 4}).get_json()
+    assert [o["order_id"] for o in first["orders"]] == [5, 4, 3, 2]
+    assert all(o["items_count"] == 1 and o["items_qty"] == 1 for o in first["orders"])
+
+    rest = admin_client.get("/api/orders", query_string={"cursor": first["next_cursor"]}).get_json()
+    assert [o["order_id"] for o in rest["orders"]] == [1]
+    assert rest["next_cursor"] is None
+
+    assert admin_client.get("/orders/history", query_string={"limit": 2}).status_code == 200
@@ -0,0 +1,135 @@
+from datetime import datetime, timezone
+
+
+class _Resp:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+def _queue_message(app):
+    from app.extensions import db
+    from app.services.outbox_service import ORDER_CONFIRMATION_TOPIC, enqueue
+
+    with app.app_context():
+        msg = enqueue(ORDER_CONFIRMATION_TOPIC, {"order_id": 1, "items": []})
+        db.session.commit()
+        return msg.id
+
+
+def test_dispatch_marks_message_sent(app, monkeypatch):
+    from app.extensions import db
+    from app.models.outbox_model import OutboxMessage
+    from app.services import outbox_service
+
+    monkeypatch.setenv("ORDER_CONFIRMATION_URL", "https://example.invalid/confirm")
+    posted = []
+    monkeypatch.setattr(outbox_service.requests, "post", lambda url, json, timeout: posted.append(json) or _Resp(200))
+
+    msg_id = _queue_message(app)
+    with app.app_context():
+        result = outbox_service.dispatch_pending()
+        msg = db.session.get(OutboxMessage, msg_id)
+
+        assert result == {"claimed": 1, "sent": 1, "failed": 0}
+        assert msg.status == "sent"
+        assert posted == [{"order_id": 1, "items": []}]
+
+
+def test_dispatch_failure_backs_off(app, monkeypatch):
+    from app.extensions import db
+    from app.models.outbox_model import OutboxMessage
+    from app.services import outbox_service
+
+    monkeypatch.setenv("ORDER_CONFIRMATION_URL", "https://example.invalid/confirm")
+    monkeypatch.setattr(outbox_service.requests, "post", lambda url, json, timeout: _Resp(503))
+
+    msg_id = _queue_message(app)
+    with app.app_context():
+        assert outbox_service.dispatch_pending()["failed"] == 1
+        assert outbox_service.dispatch_pending()["claimed"] == 0
+
+        msg = db.session.get(OutboxMessage, msg_id)
+        assert msg.status == "pending"
+        assert msg.attempts == 1
+        assert msg.next_attempt_at.replace(tzinfo=timezone.utc) > datetime.now(timezone.utc)
+
+
+def test_dispatch_coalesces_confirmations_into_batches(app, monkeypatch):
+    from app.extensions import db
+    from app.models.outbox_model import OutboxMessage
+    from app.services import outbox_service
+
+    monkeypatch.setenv("ORDER_CONFIRMATION_URL", "https://example.invalid/confirm")
+    monkeypatch.setenv("ORDER_CONFIRMATION_BATCH_SIZE", "10")
+
+    calls = []
+
+    class _BatchResp(_Resp):
+        def __init__(self, body):
+            super().__init__(207)
+            self._body = body
+
+        def json(self):
+            return self._body
+
+    def fake_post(url, json, timeout):
+        calls.append(json)
+        return _BatchResp({"results": [{"ok": True}, {"ok": False, "error": "datastore_write_failed"}]})
+
+    monkeypatch.setattr(outbox_service.requests, "post", fake_post)
+
+    first = _queue_message(app)
+    second = _queue_message(app)
+    with app.app_context():
+        result = outbox_service.dispatch_pending()
+
+        assert len(calls) == 1 and len(calls[0]) == 2
+        assert result == {"claimed": 2, "sent": 1, "failed": 1}
+        assert db.session.get(OutboxMessage, first).status == "sent"
+        assert db.session.get(OutboxMessage, second).last_error == "datastore_write_failed"
+
+
+def test_dispatch_commits_claim_before_sending(app, monkeypatch):
+    from app.extensions import db
+    from app.models.outbox_model import OutboxMessage
+    from app.services import outbox_service
+
+    monkeypatch.setenv("ORDER_CONFIRMATION_URL", "https://example.invalid/confirm")
+    commits = []
+    real_commit = db.session.commit
+
+    def _commit():
+        commits.append(1)
+        real_commit()
+
+    commits_at_send = []
+
+    def _post(url, json, timeout):
+        commits_at_send.append(len(commits))
+        return _Resp(200)
+
+    monkeypatch.setattr(outbox_service.requests, "post", _post)
+
+    msg_id = _queue_message(app)
+    with app.app_context():
+        monkeypatch.setattr(db.session, "commit", _commit)
+        outbox_service.dispatch_pending()
+
+        assert commits_at_send == [1]
+        assert db.session.get(OutboxMessage, msg_id).status == "sent"
+
+
+def test_dispatcher_thread_starts_by_default_when_confirmations_are_configured(app, monkeypatch):
+    from app import create_app
+    from app.services import outbox_service
+
+    started = []
+    monkeypatch.setattr(outbox_service, "start_dispatcher_thread", lambda a: started.append(a))
+    monkeypatch.delenv("OUTBOX_DISPATCHER", raising=False)
+
+    monkeypatch.setenv("ORDER_CONFIRMATION_URL", "https://example.invalid/confirm")
+    create_app()
+    monkeypatch.setenv("OUTBOX_DISPATCHER", "off")
+    create_app()
+
+    assert len(started) == 1
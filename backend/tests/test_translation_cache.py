@@ -0,0 +1,234 @@
+import pytest
+
+
+@pytest.fixture()
+def translate_service(app, monkeypatch):
+    from app.services import translate_service
+    monkeypatch.setenv("TRANSLATION_USAGE_FLUSH_SECONDS", "3600")
+    translate_service._lru.clear()
+    translate_service._usage_hits.clear()
+    translate_service._usage_stats.clear()
+    yield translate_service
+    translate_service._lru.clear()
+    translate_service._usage_hits.clear()
+    translate_service._usage_stats.clear()
+
+
+def test_lru_evicts_least_recently_used(translate_service):
+    lru = translate_service._TranslationLRU(2)
+    lru.put_many({"a": "A", "b": "B"})
+    lru.get_many(["a"])
+    lru.put_many({"c": "C"})
+
+    assert lru.get_many(["a", "b", "c"]) == {"a": "A", "c": "C"}
+    stats = lru.stats()
+    assert stats["size"] == 2
+    assert stats["hits"] == 3 and stats["misses"] == 1
+
+
+def test_warm_lru_translates_without_mongo(translate_service, monkeypatch):
+    key = translate_service._hash_key("Margherita", "it", None)
+    translate_service._lru.put_many({key: "Margherita (it)"})
+
+    class _NoMongo:
+        @property
+        def db(self):
+            raise AssertionError("translations_cache should not be queried")
+
+    monkeypatch.setattr(translate_service, "mongo", _NoMongo())
+
+    assert translate_service.translate_texts(["Margherita", ""], target_language="it") == ["Margherita (it)", ""]
+    assert translate_service.translation_lru_stats()["hits"] == 1
+
+
+def test_cache_misses_persist_as_one_unordered_bulk_write(translate_service):
+    calls = []
+
+    class _Collection:
+        def bulk_write(self, ops, ordered=True):
+            calls.append((ops, ordered))
+
+    docs = [{"key": "k1", "translated": "uno"}, {"key": "k2", "translated": "due"}]
+    translate_service._write_cache_docs(_Collection(), docs)
+
+    assert len(calls) == 1
+    ops, ordered = calls[0]
+    assert ordered is False
+    assert [op._filter for op in ops] == [{"key": "k1"}, {"key": "k2"}]
+
+
+def test_misses_are_chunked_and_reassembled_in_order(translate_service, monkeypatch):
+    monkeypatch.setenv("TRANSLATE_CHUNK_MAX_ITEMS", "3")
+    monkeypatch.setenv("TRANSLATE_CHUNK_MAX_CHARS", "10")
+
+    texts = ["aaaa", "bbbb", "cc", "d", "e", "ffffffffffff", "g"]
+    assert translate_service._chunk_texts(texts) == [["aaaa", "bbbb", "cc"], ["d", "e"], ["ffffffffffff"], ["g"]]
+
+    calls = []
+
+    def fake_chunk(chunk, target_language, source_language):
+        calls.append(chunk)
+        return [t.upper() for t in chunk]
+
+    monkeypatch.setattr(translate_service, "_translate_chunk", fake_chunk)
+
+    assert translate_service._translate_via_api(texts, "it", None) == [t.upper() for t in texts]
+    assert len(calls) == 4
+
+
+def test_nonblocking_falls_back_to_source_and_schedules_misses(translate_service, monkeypatch):
+    hit_key = translate_service._hash_key("Pizza", "de", None)
+    monkeypatch.setattr(translate_service, "_lookup_cached", lambda cleaned, keys: {hit_key: "Pizza (de)"})
+
+    scheduled = []
+    monkeypatch.setattr(
+        translate_service,
+        "schedule_translation",
+        lambda misses, miss_keys, target, source=None: scheduled.append((misses, target)),
+    )
+
+    results, partial = translate_service.translate_texts_nonblocking(["Pizza", "Tiramisu"], target_language="de")
+
+    assert results == ["Pizza (de)", "Tiramisu"]
+    assert partial is True
+    assert scheduled == [(["Tiramisu"], "de")]
+
+
+def test_concurrent_misses_call_the_api_once(translate_service, monkeypatch):
+    import threading
+    import time
+
+    monkeypatch.setenv("TRANSLATION_LEASES", "0")
+    calls = []
+
+    def slow_translate(misses, miss_keys, target_language, source_language, sync_persist=False):
+        calls.append(list(misses))
+        time.sleep(0.2)
+        translated = [f"{t} ({target_language})" for t in misses]
+        translate_service._lru.put_many(dict(zip(miss_keys, translated)))
+        return translated
+
+    monkeypatch.setattr(translate_service, "_translate_and_store", slow_translate)
+
+    key = translate_service._hash_key("Lasagne", "fr", None)
+    results = []
+
+    def worker():
+        results.append(translate_service._translate_single_flight(["Lasagne"], [key], "fr", None))
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert calls == [["Lasagne"]]
+    assert all(r == {key: "Lasagne (fr)"} for r in results)
+
+
+def test_local_backend_is_deterministic_and_injects_failures(translate_service, monkeypatch):
+    from app.services.translate_backends import (
+        LocalTranslateBackend,
+        TranslateBackendError,
+        set_translate_backend,
+    )
+
+    backend = LocalTranslateBackend()
+    set_translate_backend(backend)
+    monkeypatch.setenv("TRANSLATION_LEASES", "0")
+    monkeypatch.setattr(translate_service, "_lookup_cached", lambda cleaned, keys: {})
+    monkeypatch.setattr(translate_service, "_persist_translations", lambda docs, sync=False: True)
+    try:
+        assert translate_service.translate_texts(["Soup", "Bread"], target_language="es") == ["[es] Soup", "[es] Bread"]
+        assert backend.calls == 1
+
+        set_translate_backend(LocalTranslateBackend(failure_rate=1.0))
+        translate_service._lru.clear()
+        with pytest.raises(TranslateBackendError):
+            translate_service.translate_texts(["Cake"], target_language="es")
+    finally:
+        set_translate_backend(None)
+
+
+def test_usage_is_batched_until_flush(translate_service, monkeypatch):
+    written = []
+    monkeypatch.setattr(translate_service, "_write_usage", lambda hits, stats, now: written.append((hits, stats)))
+
+    hit = translate_service._hash_key("Focaccia", "it", None)
+    miss = translate_service._hash_key("Olives", "it", None)
+    for _ in range(3):
+        translate_service._record_usage("it", ["Focaccia", "Olives"], [hit, miss], {hit: "Focaccia"})
+
+    assert written == []
+
+    translate_service.flush_translation_usage(sync=True)
+    assert written == [(
+        {hit: 3},
+        {"it": {"hits": 3, "misses": 3, "chars_saved": 24, "chars_translated": 18}},
+    )]
+
+
+def test_flush_waits_for_pending_writes_without_stopping_the_writer(translate_service, monkeypatch):
+    import threading
+
+    monkeypatch.setattr(translate_service, "flush_translation_usage", lambda sync=False: None)
+    writer = translate_service._get_cache_writer()
+    release = threading.Event()
+    done = []
+    writer.submit(lambda: release.wait(5) and done.append("slow write"))
+
+    threading.Timer(0.05, release.set).start()
+    translate_service.flush_translation_cache_writes()
+    assert done == ["slow write"]
+
+    # a request thread that grabbed the writer before the flush can still submit to it
+    assert writer.submit(lambda: "ok").result() == "ok"
+    assert translate_service._get_cache_writer() is writer
+
+
+def test_release_leaves_leases_taken_over_by_another_worker(translate_service, monkeypatch):
+    from types import SimpleNamespace
+
+    class _Leases:
+        def __init__(self):
+            self.docs = {}
+
+        def bulk_write(self, ops, ordered=True):
+            for op in ops:
+                self.docs[op._filter["_id"]] = dict(op._doc["$set"])
+
+        def delete_many(self, query):
+            for key in query["_id"]["$in"]:
+                if self.docs.get(key, {}).get("owner") == query["owner"]:
+                    del self.docs[key]
+
+    leases = _Leases()
+    monkeypatch.setattr(translate_service, "mongo", SimpleNamespace(db=SimpleNamespace(translation_leases=leases)))
+
+    leased, _, stale_owner = translate_service._acquire_leases(["k1", "k2"])
+    # k1's lease expired and another worker took it over before the slow worker finished
+    leases.docs["k1"]["owner"] = "other-worker"
+
+    translate_service._release_leases(leased, stale_owner)
+
+    assert list(leases.docs) == ["k1"]
+    assert leases.docs["k1"]["owner"] == "other-worker"
+
+
+def test_leased_translations_are_written_before_the_lease_is_released(translate_service, monkeypatch):
+    from types import SimpleNamespace
+
+    events = []
+    monkeypatch.setenv("TRANSLATION_CACHE_WRITE_MODE", "async")
+    monkeypatch.setattr(translate_service, "_translate_via_api", lambda texts, target, source: [t.upper() for t in texts])
+    monkeypatch.setattr(translate_service, "mongo", SimpleNamespace(db=SimpleNamespace(
+        translations_cache=SimpleNamespace(bulk_write=lambda ops, ordered=True: events.append("cache write")),
+        translation_leases=SimpleNamespace(
+            bulk_write=lambda ops, ordered=True: events.append("lease acquired"),
+            delete_many=lambda query: events.append("lease released"),
+        ),
+    )))
+
+    key = translate_service._hash_key("Risotto", "es", None)
+    assert translate_service._translate_single_flight(["Risotto"], [key], "es", None) == {key: "RISOTTO"}
+    assert events == ["lease acquired", "cache write", "lease released"]